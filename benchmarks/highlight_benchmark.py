@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from components.reg_highlight import RegSyntaxHighlighter, RegTextWidget
+
+SIZES = [500, 2000, 8000, 32000]
+KEYSTROKES = 50
+LARGE_DOCUMENT = 100000
+
+
+def build_document(line_count):
+    lines = ["Windows Registry Editor Version 5.00", "", "[HKEY_CURRENT_USER\\Control Panel\\Colors]"]
+    for i in range(line_count):
+        lines.append(f'"Key{i}"="{i % 256} {(i * 7) % 256} {(i * 13) % 256}"')
+    return '\n'.join(lines)
+
+
+def time_keystrokes(highlighter, text_widget, line_count, incremental):
+    line = line_count // 2
+    start = time.perf_counter()
+    for _ in range(KEYSTROKES):
+        text_widget.insert(f"{line}.5", "1")
+        if incremental:
+            highlighter.highlight_changes()
+        else:
+            highlighter.highlight()
+    return (time.perf_counter() - start) / KEYSTROKES * 1000
+
+
+def run():
+    root = tk.Tk()
+    root.withdraw()
+
+    print(f"{'lines':>8} {'full (ms/key)':>15} {'incremental (ms/key)':>22}")
+    for line_count in SIZES:
+        results = []
+        for incremental in (False, True):
+            text_widget = tk.Text(root)
+            highlighter = RegSyntaxHighlighter(text_widget, incremental=incremental)
+            text_widget.insert('1.0', build_document(line_count))
+            highlighter.highlight()
+            results.append(time_keystrokes(highlighter, text_widget, line_count, incremental))
+            text_widget.destroy()
+        print(f"{line_count:>8} {results[0]:>15.3f} {results[1]:>22.3f}")
+
+    report_initial_highlight(root)
+    report_repaint_burst(root)
+    root.destroy()
+
+
+def report_initial_highlight(root):
+    document = build_document(LARGE_DOCUMENT)
+    print(f"\nInitial highlight of {LARGE_DOCUMENT} lines:")
+    for lazy in (False, True):
+        text_widget = tk.Text(root)
+        highlighter = RegSyntaxHighlighter(text_widget, lazy=lazy)
+        text_widget.insert('1.0', document)
+        start = time.perf_counter()
+        highlighter.highlight()
+        elapsed = (time.perf_counter() - start) * 1000
+
+        text_widget.yview_moveto(0.5)
+        start = time.perf_counter()
+        highlighter.highlight_changes()
+        scrolled = (time.perf_counter() - start) * 1000
+
+        text_widget.yview_moveto(0.0)
+        start = time.perf_counter()
+        highlighter.highlight_changes()
+        scrolled_back = (time.perf_counter() - start) * 1000
+
+        label = "viewport" if lazy else "full"
+        print(f"  {label:>8}: {elapsed:9.1f} ms, scroll to middle {scrolled:7.2f} ms, scroll back {scrolled_back:7.2f} ms")
+        text_widget.destroy()
+
+
+def report_repaint_burst(root):
+    widget = RegTextWidget(root)
+    widget.insert('1.0', build_document(SIZES[0]))
+    root.update()
+    widget.scheduler.reset_stats()
+
+    for _ in range(KEYSTROKES):
+        widget.insert('10.5', "1")
+    widget.flush_repaint()
+    root.update()
+
+    stats = widget.repaint_stats()
+    print(f"\n{KEYSTROKES} programmatic inserts in one burst: "
+          f"{stats['requests']} repaint requests, {stats['flushes']} flush(es), repaints {stats['repaints']}")
+    widget.destroy()
+
+
+if __name__ == '__main__':
+    run()
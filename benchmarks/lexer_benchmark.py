@@ -0,0 +1,104 @@
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from components.reg_lexer import lex_line
+
+THEMES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'themes')
+REPEAT = 5
+
+
+def legacy_highlight_line(line):
+    spans = []
+    if not line.strip():
+        return spans
+
+    if line.startswith('Windows Registry Editor Version'):
+        spans.append(('version', 0, len(line)))
+    elif line.strip().startswith(';'):
+        spans.append(('comment', 0, len(line)))
+    elif line.startswith('[') and line.endswith(']'):
+        spans.append(('header', 0, len(line)))
+        spans.append(('brackets', line.find('['), line.find('[') + 1))
+        spans.append(('brackets', line.find(']'), line.find(']') + 1))
+    elif '=' in line:
+        key_part, value_part = line.split('=', 1)
+        key_start = line.find('"')
+        key_end = line.find('"', key_start + 1) + 1 if key_start != -1 else -1
+        if key_start != -1 and key_end != -1:
+            spans.append(('string_key', key_start, key_end))
+        operator_pos = line.find('=')
+        spans.append(('operator', operator_pos, operator_pos + 1))
+        value_start = operator_pos + 1
+        if value_start < len(line):
+            value_text = line[value_start:]
+            if value_text.strip().startswith('"') and value_text.strip().endswith('"'):
+                value_start_abs = value_start + value_text.find('"')
+                spans.append(('string_value', value_start_abs, value_start + value_text.rfind('"') + 1))
+                inner_value = value_text.strip('" ')
+                for match in re.finditer(r'\b\d{1,3}\s+\d{1,3}\s+\d{1,3}\b', inner_value):
+                    spans.append(('rgb_values', value_start_abs + 1 + match.start(), value_start_abs + 1 + match.end()))
+                for match in re.finditer(r'#[0-9a-fA-F]{6}', inner_value):
+                    spans.append(('hex_value', value_start_abs + 1 + match.start(), value_start_abs + 1 + match.end()))
+    return spans
+
+
+def legacy_validate_line(line):
+    line = line.strip()
+    if not line:
+        return True
+    if line.startswith('Windows Registry Editor Version'):
+        return bool(re.match(r'^Windows Registry Editor Version \d+\.\d+$', line))
+    if line.startswith('[') and line.endswith(']'):
+        return bool(re.match(r'^\[[^\]]+\]$', line))
+    if '=' in line and not line.startswith(';'):
+        key_part, value_part = line.split('=', 1)
+        key = key_part.strip()
+        value = value_part.strip()
+        if not (key.startswith('"') and key.endswith('"')):
+            return False
+        if not (value.startswith('"') and value.endswith('"')):
+            return False
+        inner_value = value.strip('"')
+        if re.match(r'^\d{1,3}\s+\d{1,3}\s+\d{1,3}$', inner_value):
+            for val in inner_value.split():
+                if not (0 <= int(val) <= 255):
+                    return True
+        return True
+    return line.startswith(';')
+
+
+def load_lines():
+    lines = []
+    for name in sorted(os.listdir(THEMES_DIR)):
+        if name.endswith('.reg'):
+            with open(os.path.join(THEMES_DIR, name), encoding='utf-8') as f:
+                lines.extend(f.read().split('\n'))
+    return lines
+
+
+def bench(label, func, lines):
+    number = max(1, 20000 // len(lines))
+    best = min(timeit.repeat(lambda: [func(line) for line in lines], number=number, repeat=REPEAT))
+    per_line = best / (number * len(lines)) * 1e6
+    print(f"{label:<40} {per_line:8.3f} us/line")
+
+
+def run():
+    lines = load_lines()
+    print(f"{len(lines)} lines from {THEMES_DIR}\n")
+
+    bench("legacy highlight_line", legacy_highlight_line, lines)
+    bench("legacy validate_syntax (per line)", legacy_validate_line, lines)
+    bench("legacy highlight + validate", lambda line: (legacy_highlight_line(line), legacy_validate_line(line)), lines)
+    bench("lex_line (uncached)", lex_line.__wrapped__, lines)
+
+    lex_line.cache_clear()
+    bench("lex_line (cached, highlight + validate)", lambda line: (lex_line(line), lex_line(line)), lines)
+
+
+if __name__ == '__main__':
+    run()
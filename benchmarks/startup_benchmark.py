@@ -0,0 +1,127 @@
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, 'main.py')
+
+IMPORT_TIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+TRACE_OPERATIONS = ('first-paint', 'themes-loaded')
+
+# Modules that should only be imported once the feature needing them is used.
+DEFERRED_MODULES = ['requests', 'numpy', 'theme_maker', 'components.palette_search', 'components.header_utilities']
+
+# Runs main.py with a mainloop that closes the window once the theme list exists.
+DRIVER = '''
+import sys
+import runpy
+import customtkinter
+
+mainloop = customtkinter.CTk.mainloop
+
+def run_until_loaded(self, *args, **kwargs):
+    def check():
+        if getattr(sys.modules['__main__'], 'theme_list', None) is not None:
+            self.destroy()
+        else:
+            self.after(10, check)
+    self.after(10, check)
+    mainloop(self, *args, **kwargs)
+
+customtkinter.CTk.mainloop = run_until_loaded
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name='__main__')
+'''
+
+
+def read_trace(state_home):
+    trace = {}
+    try:
+        with open(os.path.join(state_home, 'vineyard', 'vineyard.log.jsonl'), encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get('operation') in TRACE_OPERATIONS:
+                    trace[record['operation']] = record['duration_ms']
+    except OSError:
+        pass
+    return trace
+
+
+def run_once():
+    with tempfile.TemporaryDirectory() as state_home:
+        env = dict(os.environ, XDG_STATE_HOME=state_home, VINEYARD_LOG_LEVEL='debug')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', DRIVER, MAIN],
+            cwd=ROOT, env=env, capture_output=True, text=True, timeout=120,
+        )
+        trace = read_trace(state_home)
+
+    imports = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            imports[match.group(4)] = (int(match.group(2)) / 1000, depth)
+
+    return result, imports, trace
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else None
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Measure Vineyard GUI import time and time to first paint.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="number of slowest top-level imports to show")
+    parser.add_argument('--paint-budget', type=float, default=None, help="fail if median first paint exceeds this (ms)")
+    parser.add_argument('--import-budget', type=float, default=None, help="fail if median import time exceeds this (ms)")
+    args = parser.parse_args()
+
+    paints = []
+    loads = []
+    totals = []
+    imports = {}
+    failure = None
+    for _ in range(args.runs):
+        result, imports, trace = run_once()
+        totals.append(sum(cumulative for cumulative, depth in imports.values() if depth == 0))
+        if 'first-paint' in trace:
+            paints.append(trace['first-paint'])
+            loads.append(trace.get('themes-loaded', trace['first-paint']))
+        elif result.returncode != 0:
+            failure = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode
+
+    print(f"Top-level imports (last run, {len(imports)} modules):")
+    top_level = sorted(((ms, name) for name, (ms, depth) in imports.items() if depth == 0), reverse=True)
+    for ms, name in top_level[:args.top]:
+        print(f"  {name:<40} {ms:8.1f} ms")
+    print(f"\nmedian import time:     {median(totals):8.1f} ms")
+
+    if paints:
+        print(f"median first paint:     {median(paints):8.1f} ms")
+        print(f"median themes listed:   {median(loads):8.1f} ms")
+    else:
+        print(f"first paint not measured (GUI failed to start: {failure})")
+
+    ok = True
+    eager = [name for name in DEFERRED_MODULES if name in imports]
+    if eager:
+        print(f"\nFAIL: imported at startup but should be deferred: {', '.join(eager)}")
+        ok = False
+    if args.import_budget is not None and median(totals) > args.import_budget:
+        print(f"FAIL: import time {median(totals):.1f} ms exceeds budget {args.import_budget:.1f} ms")
+        ok = False
+    if args.paint_budget is not None and paints and median(paints) > args.paint_budget:
+        print(f"FAIL: first paint {median(paints):.1f} ms exceeds budget {args.paint_budget:.1f} ms")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,124 @@
+import os
+import time
+import tempfile
+
+from components import user_reg
+from components.undo_stack import default_colors, known_keys, restore_target
+from components.key_schema import KEYS_PATH
+from components.reg_parser import COLORS_SECTION, format_colors_reg
+from components.wine_session import ApplyError, ApplyCancelled, get_session, wineserver_running
+
+REGEDIT = 'regedit'
+USER_REG = 'user.reg'
+BACKENDS = (REGEDIT, USER_REG)
+DEFAULT_BACKEND = os.environ.get('VINEYARD_BACKEND', REGEDIT)
+MAX_WORKERS = 4
+
+
+def check_cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        raise ApplyCancelled("Cancelled")
+
+
+def apply_reg_file(path, backend=None, prefix=None, cancel=None):
+    backend = backend or DEFAULT_BACKEND
+    session = get_session(prefix)
+
+    if backend == USER_REG:
+        session.shutdown()
+        check_cancelled(cancel)
+        return user_reg.apply_reg_file(path, session.resolved_prefix())
+
+    if backend != REGEDIT:
+        raise ValueError(f"Unknown apply backend: {backend}")
+
+    result, elapsed = session.run_regedit(path, cancel=cancel)
+    if result.returncode != 0:
+        raise ApplyError(result.stderr.strip() or f"wine regedit failed (code: {result.returncode})")
+    return elapsed
+
+
+def read_prefix_colors(backend=None, prefix=None, cancel=None):
+    session = get_session(prefix)
+    resolved = session.resolved_prefix()
+
+    if (backend or DEFAULT_BACKEND) == USER_REG:
+        session.shutdown()
+        check_cancelled(cancel)
+        user_reg.ensure_idle(resolved)
+        return user_reg.read_colors(resolved)
+
+    if not wineserver_running(resolved):
+        return user_reg.read_colors(resolved)
+
+    colors = session.query_key(COLORS_SECTION, cancel=cancel)
+    return colors if colors is not None else {}
+
+
+def color_delta(current, colors):
+    current = {key.lower(): value for key, value in current.items()}
+    return {key: value for key, value in colors.items() if current.get(key.lower()) != value}
+
+
+def full_import_warning(label, colors, extra, backend=None):
+    if extra:
+        reason = f"{extra} entries outside Control Panel\\Colors or with non-string values"
+    elif not colors:
+        reason = "no colors under Control Panel\\Colors"
+    else:
+        return None
+
+    if (backend or DEFAULT_BACKEND) == USER_REG and extra:
+        return f"Theme {label} has {reason}; the user.reg backend only writes Control Panel\\Colors, so those are skipped"
+    return f"Theme {label} has {reason}; importing the whole file instead of only the changed colors"
+
+
+def apply_colors(colors, backend=None, prefix=None, cancel=None, undo_stack=None, label=None, source=None):
+    backend = backend or DEFAULT_BACKEND
+    start = time.perf_counter()
+
+    try:
+        current = read_prefix_colors(backend, prefix, cancel)
+    except FileNotFoundError:
+        current = {}
+
+    check_cancelled(cancel)
+    if source is not None:
+        if backend == USER_REG and not colors:
+            raise ApplyError("no colors under Control Panel\\Colors for the user.reg backend to write")
+        delta = dict(colors)
+        apply_reg_file(source, backend, prefix, cancel)
+    else:
+        delta = color_delta(current, colors)
+        if not delta:
+            return delta, (time.perf_counter() - start) * 1000
+
+        if backend == USER_REG:
+            user_reg.write_colors(get_session(prefix).resolved_prefix(), delta)
+        else:
+            fd, path = tempfile.mkstemp(prefix='vineyard-delta-', suffix='.reg')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(format_colors_reg(delta))
+                apply_reg_file(path, backend, prefix, cancel)
+            finally:
+                os.remove(path)
+
+    if undo_stack is not None:
+        undo_stack.push(prefix, label, current)
+    return delta, (time.perf_counter() - start) * 1000
+
+
+def revert_colors(backend=None, prefix=None, cancel=None, undo_stack=None, keys_path=KEYS_PATH):
+    return apply_colors(default_colors(keys_path), backend, prefix, cancel, undo_stack, 'revert')
+
+
+def undo_last_apply(undo_stack, backend=None, prefix=None, cancel=None, keys_path=KEYS_PATH):
+    snapshot = undo_stack.peek(prefix)
+    if snapshot is None:
+        return None
+
+    target = restore_target(snapshot['colors'], known_keys(keys_path))
+    changed, elapsed = apply_colors(target, backend, prefix, cancel)
+    undo_stack.pop(prefix)
+    return snapshot['label'], changed, elapsed
@@ -0,0 +1,170 @@
+import time
+import threading
+
+from components.apply_backend import MAX_WORKERS
+from components.wine_session import ApplyCancelled, prefix_key, release_session
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+SUPERSEDED = 'superseded'
+
+
+class ApplyJob:
+    def __init__(self, prefix, label, run, on_done):
+        self.prefix = prefix
+        self.label = label
+        self.run = run
+        self.on_done = on_done
+        self.state = PENDING
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+
+    @property
+    def wait_ms(self):
+        end = self.started if self.started is not None else time.monotonic()
+        return (end - self.submitted) * 1000
+
+    @property
+    def run_ms(self):
+        if self.started is None:
+            return 0.0
+        end = self.finished if self.finished is not None else time.monotonic()
+        return (end - self.started) * 1000
+
+    def cancel(self):
+        self.cancel_event.set()
+
+
+class ApplyQueue:
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._pending = {}
+        self._running = {}
+        self._workers = set()
+
+    def submit(self, prefix, label, run, on_done=None):
+        key = prefix_key(prefix)
+        job = ApplyJob(prefix, label, run, on_done)
+
+        with self._lock:
+            superseded = self._pending.get(key)
+            self._pending[key] = job
+            start_worker = key not in self._workers
+            if start_worker:
+                self._workers.add(key)
+
+        if superseded is not None:
+            self._finish(superseded, SUPERSEDED)
+        if start_worker:
+            threading.Thread(target=self._work, args=(key,), name=f"ApplyQueue:{key}", daemon=True).start()
+        return job
+
+    def submit_all(self, prefixes, label, run, on_done=None, on_complete=None):
+        prefixes = list(prefixes)
+        remaining = [len(prefixes)]
+        start = time.perf_counter()
+        lock = threading.Lock()
+
+        def done(job):
+            if on_done is not None:
+                on_done(job)
+            with lock:
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished and on_complete is not None:
+                on_complete((time.perf_counter() - start) * 1000)
+
+        return [self.submit(prefix, label, run, done) for prefix in prefixes]
+
+    def _work(self, key):
+        while True:
+            with self._lock:
+                job = self._pending.pop(key, None)
+                if job is None:
+                    self._workers.discard(key)
+                    release_session(key)
+                    return
+                self._running[key] = job
+
+            with self._slots:
+                if job.cancel_event.is_set():
+                    state = CANCELLED
+                else:
+                    job.state = RUNNING
+                    job.started = time.monotonic()
+                    try:
+                        job.result = job.run(job.prefix, job.cancel_event)
+                        state = DONE
+                    except ApplyCancelled:
+                        state = CANCELLED
+                    except Exception as e:
+                        job.error = e
+                        state = FAILED
+
+            with self._lock:
+                self._running.pop(key, None)
+            self._finish(job, state)
+
+    def _finish(self, job, state):
+        job.state = state
+        job.finished = time.monotonic()
+        if job.on_done is not None:
+            try:
+                job.on_done(job)
+            except Exception:
+                pass
+
+    def cancel(self, prefix=None):
+        with self._lock:
+            if prefix is None:
+                pending = list(self._pending.values())
+                running = list(self._running.values())
+                self._pending.clear()
+            else:
+                key = prefix_key(prefix)
+                pending = [self._pending.pop(key)] if key in self._pending else []
+                running = [self._running[key]] if key in self._running else []
+
+        for job in running:
+            job.cancel()
+        for job in pending:
+            job.cancel()
+            self._finish(job, CANCELLED)
+        return len(pending) + len(running)
+
+    def depth(self, prefix=None):
+        with self._lock:
+            if prefix is None:
+                return len(self._pending) + len(self._running)
+            key = prefix_key(prefix)
+            return int(key in self._pending) + int(key in self._running)
+
+    def stats(self):
+        with self._lock:
+            keys = set(self._pending) | set(self._running)
+            return {
+                key: {
+                    'running': self._running[key].label if key in self._running else None,
+                    'pending': self._pending[key].label if key in self._pending else None,
+                    'wait_ms': self._pending[key].wait_ms if key in self._pending else 0.0,
+                }
+                for key in keys
+            }
+
+
+_default_queue = None
+
+
+def get_queue():
+    global _default_queue
+    if _default_queue is None:
+        _default_queue = ApplyQueue()
+    return _default_queue
@@ -1,17 +1,23 @@
 from customtkinter import *
 import tkinter as tk
 from datetime import datetime
+import queue
 import re
 
+FLUSH_INTERVAL = 16
+IDLE_FLUSH_INTERVAL = 128
+
 class Console(CTkFrame):
-    def __init__(self, parent):
+    def __init__(self, parent, log_sink=None):
         super().__init__(parent)
+        self.log_sink = log_sink
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
         self.pack(fill="both", expand=True, padx=5, pady=5)
         
         self.max_lines = 500
         self.current_lines = 0
+        self._pending = queue.SimpleQueue()
         
         self.colors = {
             'info': '#FFFFFF',
@@ -24,6 +30,7 @@ class Console(CTkFrame):
         }
         
         self.setup_ui()
+        self.after(FLUSH_INTERVAL, self._poll)
     
     def setup_ui(self):
         header_frame = CTkFrame(self, height=30)
@@ -75,22 +82,44 @@ class Console(CTkFrame):
         
         self.text_widget.config(state=tk.DISABLED)
     
-    def write(self, message, msg_type='info'):
-        self.text_widget.config(state=tk.NORMAL)
-        
+    def write(self, message, msg_type='info', operation=None, duration=None):
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.text_widget.insert(tk.END, f"[{timestamp}] ", 'timestamp')
-        
-        self.text_widget.insert(tk.END, message, msg_type)
-        self.text_widget.insert(tk.END, "\n")
-        
-        self.text_widget.see(tk.END)
-        
-        self.current_lines += 1
+        self._pending.put((timestamp, str(message), msg_type))
+        if self.log_sink is not None:
+            self.log_sink.emit(msg_type, str(message), operation, duration)
+
+    def _poll(self, interval=FLUSH_INTERVAL):
+        if self.flush():
+            interval = FLUSH_INTERVAL
+        else:
+            interval = min(interval * 2, IDLE_FLUSH_INTERVAL)
+        self.after(interval, self._poll, interval)
+
+    def flush(self):
+        batch = []
+        try:
+            while True:
+                batch.append(self._pending.get_nowait())
+        except queue.Empty:
+            pass
+        if not batch:
+            return False
+
+        if len(batch) > self.max_lines:
+            batch = batch[-self.max_lines:]
+
+        chunks = []
+        for timestamp, message, msg_type in batch:
+            chunks.extend((f"[{timestamp}] ", 'timestamp', message, msg_type, "\n", ()))
+            self.current_lines += message.count("\n") + 1
+
+        self.text_widget.config(state=tk.NORMAL)
+        self.text_widget.insert(tk.END, *chunks)
         if self.current_lines > self.max_lines:
             self.trim_lines()
-        
+        self.text_widget.see(tk.END)
         self.text_widget.config(state=tk.DISABLED)
+        return True
     
     def trim_lines(self):
         lines_to_remove = self.current_lines - self.max_lines
@@ -99,6 +128,7 @@ class Console(CTkFrame):
             self.current_lines = self.max_lines
     
     def clear_console(self):
+        self.flush()
         self.text_widget.config(state=tk.NORMAL)
         self.text_widget.delete(1.0, tk.END)
         self.current_lines = 0
@@ -107,6 +137,7 @@ class Console(CTkFrame):
     
     def copy_to_clipboard(self):
         try:
+            self.flush()
             content = self.text_widget.get(1.0, tk.END)
             self.clipboard_clear()
             self.clipboard_append(content.strip())
@@ -114,23 +145,23 @@ class Console(CTkFrame):
         except Exception as e:
             self.write(f"Failed to copy to clipboard: {str(e)}", 'error')
     
-    def info(self, message):
-        self.write(message, 'info')
+    def info(self, message, operation=None, duration=None):
+        self.write(message, 'info', operation, duration)
     
-    def success(self, message):
-        self.write(message, 'success')
+    def success(self, message, operation=None, duration=None):
+        self.write(message, 'success', operation, duration)
     
-    def warning(self, message):
-        self.write(message, 'warning')
+    def warning(self, message, operation=None, duration=None):
+        self.write(message, 'warning', operation, duration)
     
-    def error(self, message):
-        self.write(message, 'error')
+    def error(self, message, operation=None, duration=None):
+        self.write(message, 'error', operation, duration)
     
-    def debug(self, message):
-        self.write(message, 'debug')
+    def debug(self, message, operation=None, duration=None):
+        self.write(message, 'debug', operation, duration)
     
-    def system(self, message):
-        self.write(message, 'system')
+    def system(self, message, operation=None, duration=None):
+        self.write(message, 'system', operation, duration)
     
     def print_exception(self, exception):
         import traceback
@@ -4,19 +4,44 @@ class Header(CTkFrame):
     def __init__(self, master=None, **kwargs):
         super().__init__(master, height=50, corner_radius=0, **kwargs)
         self.pack(fill="x", side="top")
+        self._search_after_id = None
+        self._last_query = None
+        self._search_entry = None
+        self._search_callback = None
 
     def add_button(self, text, command=None):
         button = CTkButton(self, text=text, command=command)
         button.pack(pady=5, padx=2, side="right", anchor="n")
         return button
 
-    def add_search(self, callback):
+    def add_search(self, callback, delay=150):
         search_entry = CTkEntry(self, placeholder_text="Search themes...")
         search_entry.pack(pady=5, padx=5, side="left", anchor="n", fill="x", expand=True)
 
-        def on_key_release(event):
+        def run_search():
+            self._search_after_id = None
             query = search_entry.get().strip()
-            callback(query)
+            if query != self._last_query:
+                self._last_query = query
+                callback(query)
+
+        def on_key_release(event):
+            if self._search_after_id is not None:
+                self.after_cancel(self._search_after_id)
+            self._search_after_id = self.after(delay, run_search)
 
         search_entry.bind("<KeyRelease>", on_key_release)
-        return search_entry
\ No newline at end of file
+        self._search_entry = search_entry
+        self._search_callback = callback
+        return search_entry
+
+    def set_search(self, query):
+        if self._search_entry is None:
+            return
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+            self._search_after_id = None
+        self._search_entry.delete(0, "end")
+        self._search_entry.insert(0, query)
+        self._last_query = query
+        self._search_callback(query)
\ No newline at end of file
@@ -1,49 +1,48 @@
 import os
 import subprocess
-import requests
-import threading
+from components.wine_session import ApplyError
+from components.apply_backend import revert_colors
+from components.undo_stack import get_undo_stack
+from components.apply_queue import get_queue, SUPERSEDED, CANCELLED
 
 THEMES_PATH = os.path.join(os.getcwd(), 'themes')
-_revert_lock = threading.Lock()
 
-def run_revert_command(console, root):
-    if not _revert_lock.acquire(blocking=False):
-        console.system("⚠️ Revert already in progress, please wait…")
-        return
+def run_revert_command(console, backend=None, prefixes=None):
+    prefixes = prefixes or [None]
+    undo_stack = get_undo_stack()
 
-    revert_path = os.path.join(THEMES_PATH, 'revert.reg')
-    os.makedirs(THEMES_PATH, exist_ok=True)
+    def report(job):
+        where = f" [{job.prefix}]" if len(prefixes) > 1 else ""
+        if job.state == SUPERSEDED:
+            console.debug(f"Skipped revert{where}: superseded by a newer job")
+        elif job.state == CANCELLED:
+            console.warning(f"Cancelled revert{where}")
+        elif isinstance(job.error, ApplyError):
+            console.error(f"Revert failed{where}: {job.error}", "revert", job.run_ms)
+        elif isinstance(job.error, FileNotFoundError):
+            console.error("'wine' command not found. Please ensure Wine is installed and in your PATH.")
+        elif job.error is not None:
+            console.error(f"Unexpected error{where}: {job.error}", "revert", job.run_ms)
+        elif not job.result[0]:
+            console.system(f"Already using the default theme{where}, skipped Wine")
+        else:
+            console.system(
+                f"Successfully reverted to default theme{where} ({job.result[1]:.0f} ms, waited {job.wait_ms:.0f} ms)",
+                "revert", job.result[1]
+            )
 
-    def worker():
-        try:
-            if not os.path.isfile(revert_path):
-                root.after(0, lambda: console.system("revert.reg not found - downloading..."))
-                
-                url = "https://raw.githubusercontent.com/YSSF8/Vineyard/refs/heads/main/themes/revert.reg"
-                resp = requests.get(url, timeout=15)
-                resp.raise_for_status()
-                
-                with open(revert_path, "wb") as f:
-                    f.write(resp.content)
-                
-                root.after(0, lambda: console.system("Downloaded revert.reg successfully"))
-
-            root.after(0, lambda: console.system("Reverting to default theme..."))
-            exit_code = os.system(f'wine regedit "{revert_path}"')
-            
-            if exit_code == 0:
-                root.after(0, lambda: console.system("Successfully reverted to default theme"))
-            else:
-                root.after(0, lambda: console.error(f"wine regedit failed (code: {exit_code})"))
-                
-        except requests.RequestException as e:
-            root.after(0, lambda: console.error(f"Download failed: {e}"))
-        except Exception as e:
-            root.after(0, lambda: console.error(f"Unexpected error: {e}"))
-        finally:
-            _revert_lock.release()
+    def finished(total):
+        if len(prefixes) > 1:
+            console.system(f"Finished reverting {len(prefixes)} prefixes ({total:.0f} ms total)", "revert", total)
 
-    threading.Thread(target=worker, daemon=True).start()
+    console.system("Reverting to default theme...")
+    get_queue().submit_all(
+        prefixes,
+        "revert",
+        lambda prefix, cancel: revert_colors(backend, prefix, cancel, undo_stack),
+        report,
+        finished,
+    )
 
 def open_themes_path(console):
     if not os.path.exists('themes'):
@@ -0,0 +1,88 @@
+import time
+from tkinter import TclError
+
+FRAME_BUDGET_MS = 8
+
+
+class IncrementalBuilder:
+    def __init__(self, widget, budget_ms=FRAME_BUDGET_MS):
+        self.widget = widget
+        self.budget = budget_ms / 1000
+        self.built = 0
+        self._pending = None
+        self._after_id = None
+
+    @property
+    def running(self):
+        return self._pending is not None
+
+    def start(self, items, build, on_slice=None, on_done=None):
+        self.cancel()
+        self.built = 0
+        self._pending = iter(items)
+        self._build = build
+        self._on_slice = on_slice
+        self._on_done = on_done
+        self._yield()
+
+    def cancel(self):
+        self._pending = None
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except TclError:
+                pass
+            self._after_id = None
+
+    def _alive(self):
+        try:
+            return bool(self.widget.winfo_exists())
+        except TclError:
+            return False
+
+    def _yield(self):
+        try:
+            self._after_id = self.widget.after_idle(self._schedule)
+        except TclError:
+            self._pending = None
+
+    def _schedule(self):
+        try:
+            self._after_id = self.widget.after(0, self._step)
+        except TclError:
+            self._pending = None
+
+    def _step(self):
+        self._after_id = None
+        pending, build = self._pending, self._build
+        on_slice, on_done = self._on_slice, self._on_done
+        if pending is None:
+            return
+        if not self._alive():
+            self._pending = None
+            return
+
+        deadline = time.perf_counter() + self.budget
+        finished = True
+        try:
+            for item in pending:
+                build(item)
+                self.built += 1
+                if time.perf_counter() >= deadline:
+                    finished = False
+                    break
+        except TclError:
+            self._pending = None
+            return
+
+        if self._pending is not pending:
+            return
+        if finished:
+            self._pending = None
+        if on_slice is not None:
+            on_slice()
+        if finished:
+            if on_done is not None:
+                on_done()
+        elif self._pending is pending:
+            self._yield()
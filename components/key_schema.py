@@ -0,0 +1,76 @@
+import os
+import json
+import threading
+
+KEYS_PATH = 'keys.json'
+
+
+def normalize_key(key):
+    return key.strip().lower()
+
+
+class KeySchema:
+    def __init__(self, path=KEYS_PATH):
+        self.path = path
+        self.signature = None
+        self.keys = []
+        self.defaults = {}
+        self.normalized = frozenset()
+        self.normalized_defaults = {}
+        self.error = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def refresh(self):
+        signature = self._stat()
+        if self._loaded and signature == self.signature:
+            return False
+
+        with self._lock:
+            if self._loaded and signature == self.signature:
+                return False
+
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.error = None
+            except (OSError, ValueError) as e:
+                data = {}
+                self.error = e
+
+            self.keys = list(data)
+            self.defaults = dict(data)
+            self.normalized_defaults = {normalize_key(key): value for key, value in data.items()}
+            self.normalized = frozenset(self.normalized_defaults)
+            self.signature = signature
+            self._loaded = True
+            return True
+
+    def unknown_keys(self, colors):
+        self.refresh()
+        return [key for key in colors if normalize_key(key) not in self.normalized]
+
+    def default_colors(self):
+        self.refresh()
+        return dict(self.defaults)
+
+
+_schemas = {}
+_schemas_lock = threading.Lock()
+
+
+def get_schema(path=KEYS_PATH):
+    key = os.path.abspath(path)
+    with _schemas_lock:
+        schema = _schemas.get(key)
+        if schema is None:
+            schema = _schemas[key] = KeySchema(path)
+    schema.refresh()
+    return schema
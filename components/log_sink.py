@@ -0,0 +1,106 @@
+import os
+import json
+import sys
+import queue
+import threading
+from datetime import datetime, timezone
+
+from components.undo_stack import state_dir
+
+LOG_FILENAME = 'vineyard.log.jsonl'
+LEVELS = {
+    'debug': 10,
+    'info': 20,
+    'success': 20,
+    'system': 20,
+    'warning': 30,
+    'error': 40,
+}
+
+_STOP = object()
+
+
+class LogSink:
+    def __init__(self, path=None, max_bytes=1024 * 1024, backups=3, level=None):
+        self.path = path or os.path.join(state_dir(), LOG_FILENAME)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="LogSink", daemon=True)
+        self._thread.start()
+
+        name = (level or os.environ.get('VINEYARD_LOG_LEVEL') or 'info').strip().lower()
+        self.level = LEVELS.get(name, LEVELS['info'])
+        if name not in LEVELS:
+            message = f"Unknown log level '{name}', using 'info' (expected one of: {', '.join(LEVELS)})"
+            print(message, file=sys.stderr)
+            self.emit('warning', message)
+
+    def emit(self, level, message, operation=None, duration=None):
+        if LEVELS.get(level, LEVELS['info']) < self.level:
+            return
+        record = {
+            'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'level': level,
+            'message': message,
+        }
+        if operation is not None:
+            record['operation'] = operation
+        if duration is not None:
+            record['duration_ms'] = round(duration, 1)
+        self._queue.put(record)
+
+    def close(self, timeout=2):
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        stream = None
+        try:
+            while True:
+                records = [self._queue.get()]
+                try:
+                    while True:
+                        records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+
+                stop = _STOP in records
+                records = [record for record in records if record is not _STOP]
+                if records:
+                    stream = self._write(stream, records)
+                if stop:
+                    return
+        finally:
+            if stream is not None:
+                stream.close()
+
+    def _write(self, stream, records):
+        try:
+            if stream is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                stream = open(self.path, 'a', encoding='utf-8')
+            stream.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+            stream.flush()
+            if stream.tell() >= self.max_bytes:
+                stream.close()
+                stream = None
+                self._rotate()
+        except OSError:
+            self.dropped += len(records)
+            if stream is not None:
+                stream.close()
+            stream = None
+        return stream
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
@@ -0,0 +1,219 @@
+import re
+
+import numpy as np
+
+from components.reg_parser import parse_rgb
+from components.key_schema import get_schema, KEYS_PATH
+
+BACKGROUND_KEYS = ['Window', 'ButtonFace', 'Background', 'Menu', 'AppWorkSpace', 'InfoWindow']
+CONTRAST_PAIRS = [
+    ('WindowText', 'Window'),
+    ('ButtonText', 'ButtonFace'),
+    ('MenuText', 'Menu'),
+    ('HilightText', 'Hilight'),
+    ('TitleText', 'ActiveTitle'),
+    ('InfoText', 'InfoWindow'),
+]
+
+LIGHTNESS_THRESHOLD = 50
+MIN_CONTRAST = 50
+
+HEX_QUERY_RE = re.compile(r'#?([0-9a-fA-F]{6})')
+
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_WHITE_D65 = np.array([0.95047, 1.0, 1.08883])
+
+
+def srgb_to_lab(rgb):
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    c = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    xyz = (c @ _RGB_TO_XYZ.T) / _WHITE_D65
+
+    delta = 6 / 29
+    f = np.where(xyz > delta ** 3, np.cbrt(xyz), xyz / (3 * delta ** 2) + 4 / 29)
+
+    lab = np.empty_like(f)
+    lab[..., 0] = 116 * f[..., 1] - 16
+    lab[..., 1] = 500 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200 * (f[..., 1] - f[..., 2])
+    return lab
+
+
+class PaletteIndex:
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self._key_positions = {key.lower(): i for i, key in enumerate(self.keys)}
+        self._rows = {}
+        self._signatures = {}
+        self.names = []
+        self.lab = np.zeros((0, len(self.keys), 3))
+        self.mask = np.zeros((0, len(self.keys)), dtype=bool)
+        self._positions = {}
+
+    @classmethod
+    def from_keys_file(cls, keys_path=KEYS_PATH):
+        schema = get_schema(keys_path)
+        if schema.error is not None:
+            raise schema.error
+        return cls(schema.keys)
+
+    def _vectorize(self, colors):
+        rgb = np.zeros((len(self.keys), 3))
+        mask = np.zeros(len(self.keys), dtype=bool)
+        for key, value in colors.items():
+            position = self._key_positions.get(key.lower())
+            parsed = parse_rgb(value) if isinstance(value, str) else None
+            if position is not None and parsed is not None:
+                rgb[position] = parsed
+                mask[position] = True
+        return rgb, mask
+
+    def sync(self, entries):
+        changed = False
+        for name in list(self._rows):
+            if name not in entries:
+                del self._rows[name]
+                del self._signatures[name]
+                changed = True
+
+        for name, entry in entries.items():
+            signature = entry.get('sha1')
+            if self._signatures.get(name) == signature and name in self._rows:
+                continue
+            self._rows[name] = self._vectorize(entry['colors'])
+            self._signatures[name] = signature
+            changed = True
+
+        if changed:
+            self._stack()
+        return changed
+
+    def _stack(self):
+        self.names = sorted(self._rows)
+        self._positions = {name: i for i, name in enumerate(self.names)}
+        if self.names:
+            rgb = np.stack([self._rows[name][0] for name in self.names])
+            self.mask = np.stack([self._rows[name][1] for name in self.names])
+            self.lab = srgb_to_lab(rgb).astype(np.float32)
+        else:
+            self.lab = np.zeros((0, len(self.keys), 3))
+            self.mask = np.zeros((0, len(self.keys)), dtype=bool)
+
+    def _rank(self, scores, n, exclude=None):
+        if len(scores) > n + 1:
+            order = np.argpartition(scores, n)[:n + 1]
+            order = order[np.argsort(scores[order], kind='stable')]
+        else:
+            order = np.argsort(scores, kind='stable')
+        results = []
+        for i in order:
+            if not np.isfinite(scores[i]) or self.names[i] == exclude:
+                continue
+            results.append((self.names[i], float(scores[i])))
+            if len(results) >= n:
+                break
+        return results
+
+    def _columns(self, keys):
+        return [self._key_positions[key.lower()] for key in keys if key.lower() in self._key_positions]
+
+    def resolve(self, name):
+        if name in self._positions:
+            return name
+        lowered = name.lower()
+        for candidate in self.names:
+            if candidate.lower() in (lowered, lowered + '.reg'):
+                return candidate
+        return None
+
+    def similar(self, name, n=10):
+        name = self.resolve(name)
+        if name is None:
+            return []
+        position = self._positions[name]
+
+        both = self.mask & self.mask[position]
+        shared = both.sum(axis=1)
+        squared = ((self.lab - self.lab[position]) ** 2).sum(axis=2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            distance = np.sqrt((squared * both).sum(axis=1) / shared)
+        distance[shared == 0] = np.inf
+        return self._rank(distance, n, exclude=name)
+
+    def lightness(self):
+        columns = self._columns(BACKGROUND_KEYS)
+        lightness = self.lab[:, columns, 0]
+        mask = self.mask[:, columns]
+        count = mask.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = (lightness * mask).sum(axis=1) / count
+        mean[count == 0] = np.nan
+        return mean
+
+    def contrast(self):
+        pairs = [
+            (self._key_positions[fg.lower()], self._key_positions[bg.lower()])
+            for fg, bg in CONTRAST_PAIRS
+            if fg.lower() in self._key_positions and bg.lower() in self._key_positions
+        ]
+        if not pairs:
+            return np.full(len(self.names), np.nan)
+        fg, bg = np.array(pairs).T
+        difference = np.abs(self.lab[:, fg, 0] - self.lab[:, bg, 0])
+        mask = self.mask[:, fg] & self.mask[:, bg]
+        count = mask.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = (difference * mask).sum(axis=1) / count
+        mean[count == 0] = np.nan
+        return mean
+
+    def darkest(self, n=10):
+        lightness = self.lightness()
+        with np.errstate(invalid='ignore'):
+            scores = np.where(lightness < LIGHTNESS_THRESHOLD, lightness, np.inf)
+        return self._rank(scores, n)
+
+    def lightest(self, n=10):
+        lightness = self.lightness()
+        with np.errstate(invalid='ignore'):
+            scores = np.where(lightness > LIGHTNESS_THRESHOLD, -lightness, np.inf)
+        return self._rank(scores, n)
+
+    def highest_contrast(self, n=10):
+        contrast = self.contrast()
+        with np.errstate(invalid='ignore'):
+            scores = np.where(contrast >= MIN_CONTRAST, -contrast, np.inf)
+        return self._rank(scores, n)
+
+    def nearest_color(self, hex_color, n=10):
+        match = HEX_QUERY_RE.fullmatch(hex_color.strip())
+        if not match:
+            return []
+        value = match.group(1)
+        seed = srgb_to_lab([int(value[i:i + 2], 16) for i in (0, 2, 4)]).astype(np.float32)
+        distance = np.sqrt(((self.lab - seed) ** 2).sum(axis=2))
+        distance[~self.mask] = np.inf
+        if not self.names:
+            return []
+        return self._rank(distance.min(axis=1), n)
+
+    def query(self, text, n=10):
+        text = text.strip()
+        lowered = text.lower()
+        if lowered.startswith('like:'):
+            return self.similar(text[5:].strip(), n)
+        if lowered.startswith('color:'):
+            return self.nearest_color(text[6:], n)
+        if lowered == 'is:dark':
+            return self.darkest(n)
+        if lowered == 'is:light':
+            return self.lightest(n)
+        if lowered == 'is:high-contrast':
+            return self.highest_contrast(n)
+        if HEX_QUERY_RE.fullmatch(text) and text.startswith('#'):
+            return self.nearest_color(text, n)
+        return None
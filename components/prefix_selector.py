@@ -0,0 +1,86 @@
+import os
+from customtkinter import CTkToplevel, CTkFrame, CTkButton, CTkLabel, CTkCheckBox, CTkScrollableFrame, CTkFont
+from tkinter import filedialog
+from components.wine_session import discover_prefixes, default_prefix
+
+
+class PrefixSelector:
+    def __init__(self, console, on_change):
+        self.console = console
+        self.on_change = on_change
+        self.selected = [os.path.realpath(default_prefix())]
+        self._window = None
+        self._checkboxes = {}
+        self._list_frame = None
+
+    def open(self):
+        if self._window is not None and self._window.winfo_exists():
+            self._window.lift()
+            self._window.focus_force()
+            return
+
+        self._window = CTkToplevel()
+        self._window.title("Vineyard - Target Prefixes")
+        self._window.geometry("520x420")
+
+        title = CTkLabel(self._window, text="Apply themes to", font=CTkFont(size=16, weight="bold"))
+        title.pack(pady=(10, 5))
+
+        self._list_frame = CTkScrollableFrame(self._window)
+        self._list_frame.pack(fill="both", expand=True, padx=10, pady=5)
+
+        button_frame = CTkFrame(self._window, fg_color="transparent")
+        button_frame.pack(fill="x", padx=10, pady=10)
+
+        CTkButton(button_frame, text="Done", width=80, command=self.close).pack(side="right", padx=(5, 0))
+        CTkButton(button_frame, text="Add Prefix...", width=100, command=self.add_prefix).pack(side="right", padx=5)
+        CTkButton(button_frame, text="Rescan", width=80, command=self.populate).pack(side="left")
+
+        self.populate()
+        self._window.protocol("WM_DELETE_WINDOW", self.close)
+        self._window.focus_force()
+
+    def populate(self):
+        for widget in self._list_frame.winfo_children():
+            widget.destroy()
+        self._checkboxes = {}
+
+        prefixes = discover_prefixes()
+        for prefix in self.selected:
+            if prefix not in prefixes:
+                prefixes.append(prefix)
+
+        for prefix in prefixes:
+            checkbox = CTkCheckBox(self._list_frame, text=prefix, command=self._update_selection)
+            if prefix in self.selected:
+                checkbox.select()
+            checkbox.pack(anchor="w", padx=5, pady=3)
+            self._checkboxes[prefix] = checkbox
+
+    def add_prefix(self):
+        path = filedialog.askdirectory(parent=self._window, title="Select Wine prefix")
+        if not path:
+            return
+        path = os.path.realpath(path)
+        if not os.path.isfile(os.path.join(path, 'system.reg')):
+            self.console.warning(f"{path} does not look like a Wine prefix (no system.reg)")
+            return
+        self.selected.append(path)
+        self.populate()
+        self._update_selection()
+
+    def _update_selection(self):
+        selected = [prefix for prefix, checkbox in self._checkboxes.items() if checkbox.get()]
+        if not selected:
+            for prefix in self.selected:
+                if prefix in self._checkboxes:
+                    self._checkboxes[prefix].select()
+            self.console.warning("At least one prefix must stay selected")
+            return
+        self.selected = selected
+        self.on_change(list(self.selected))
+
+    def close(self):
+        if self._window is not None and self._window.winfo_exists():
+            self._window.destroy()
+        self._window = None
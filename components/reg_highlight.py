@@ -1,6 +1,59 @@
 import tkinter as tk
 from tkinter import ttk
-import re
+from components.reg_lexer import lex, lex_line, VERSION, HEADER, ENTRY
+
+class RepaintScheduler:
+    def __init__(self, widget):
+        self.widget = widget
+        self._jobs = {}
+        self._pending = set()
+        self._after_id = None
+        self.flush_count = 0
+        self.request_count = 0
+        self.repaint_counts = {}
+
+    def register(self, name, callback):
+        self._jobs[name] = callback
+        self.repaint_counts.setdefault(name, 0)
+
+    def mark_dirty(self, *names):
+        self.request_count += 1
+        self._pending.update(names)
+        if self._after_id is None:
+            self._after_id = self.widget.after_idle(self.flush)
+
+    def flush(self):
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+        if not self._pending:
+            return
+
+        pending = self._pending
+        self._pending = set()
+        self.flush_count += 1
+
+        for name, callback in self._jobs.items():
+            if name in pending:
+                self.repaint_counts[name] += 1
+                callback()
+
+    def stats(self):
+        return {
+            'requests': self.request_count,
+            'flushes': self.flush_count,
+            'repaints': dict(self.repaint_counts),
+        }
+
+    def reset_stats(self):
+        self.request_count = 0
+        self.flush_count = 0
+        self.repaint_counts = {name: 0 for name in self.repaint_counts}
+
 
 class RegSyntaxHighlighter:
     COLORS = {
@@ -22,9 +75,24 @@ class RegSyntaxHighlighter:
         'warning': '#ff8800',
     }
 
-    def __init__(self, text_widget):
+    LAZY_THRESHOLD = 5000
+    LAZY_MARGIN = 200
+
+    def __init__(self, text_widget, incremental=True, scheduler=None, lazy=None):
         self.text_widget = text_widget
+        self.incremental = incremental
+        self.scheduler = scheduler
+        self.lazy = lazy
+        self._lazy_active = False
+        self._tagged_ranges = []
+        self._dirty_lines = set()
+        self._full_pass = True
+        self._orig_command = None
         self.setup_theme()
+        if self.incremental:
+            self.install_edit_tracking()
+        if self.scheduler:
+            self.scheduler.register('highlight', self.highlight_changes)
         self.bind_events()
     
     def setup_theme(self):
@@ -64,93 +132,228 @@ class RegSyntaxHighlighter:
             self.text_widget.tag_configure(tag_name, **config)
     
     def bind_events(self):
-        self.text_widget.bind('<KeyRelease>', lambda e: self.highlight())
-        self.text_widget.bind('<ButtonRelease>', lambda e: self.highlight())
-        self.text_widget.bind('<<Modified>>', self.on_modified)
+        self.text_widget.bind('<KeyRelease>', lambda e: self.request_highlight(), add='+')
+        self.text_widget.bind('<ButtonRelease>', lambda e: self.request_highlight(), add='+')
+        if not self.scheduler:
+            self.text_widget.bind('<<Modified>>', self.on_modified, add='+')
     
     def on_modified(self, event=None):
         if self.text_widget.edit_modified():
-            self.highlight()
+            self.request_highlight()
             self.text_widget.edit_modified(False)
-    
+
+    def request_highlight(self):
+        if self.scheduler:
+            self.scheduler.mark_dirty('highlight')
+        else:
+            self.highlight_changes()
+
+    def install_edit_tracking(self):
+        widget = self.text_widget
+        self._orig_command = widget._w + '_orig'
+        widget.tk.call('rename', widget._w, self._orig_command)
+        widget.tk.createcommand(widget._w, self._dispatch)
+        widget.bind('<Destroy>', self._remove_edit_tracking, add='+')
+
+    def _remove_edit_tracking(self, event=None):
+        if event is not None and event.widget is not self.text_widget:
+            return
+        try:
+            self.text_widget.tk.deletecommand(self.text_widget._w)
+        except tk.TclError:
+            pass
+
+    def _call_orig(self, *args):
+        command = self._orig_command or self.text_widget._w
+        return self.text_widget.tk.call((command,) + args)
+
+    def _line_of(self, index):
+        return int(str(self._call_orig('index', index)).split('.')[0])
+
+    def _last_line(self):
+        return self._line_of('end-1c')
+
+    def _dispatch(self, *args):
+        if not args:
+            return self._call_orig()
+
+        op = args[0]
+        if op == 'insert' and len(args) >= 3:
+            start = min(self._line_of(args[1]), self._last_line())
+            result = self._call_orig(*args)
+            self._track_insert(start, sum(chars.count('\n') for chars in args[2::2]))
+            return result
+
+        if op == 'delete' and len(args) >= 2:
+            self._track_delete(*args[1:3])
+            return self._call_orig(*args)
+
+        if op == 'replace' and len(args) >= 4:
+            self._track_delete(args[1], args[2])
+            start = self._line_of(args[1])
+            result = self._call_orig(*args)
+            self._track_insert(start, sum(chars.count('\n') for chars in args[3::2]))
+            return result
+
+        return self._call_orig(*args)
+
+    def _track_insert(self, start, added_lines):
+        if self._full_pass:
+            return
+        if added_lines:
+            self._shift_dirty(start, added_lines)
+            self._tagged_ranges = [
+                (a + added_lines, b + added_lines) if a > start else
+                (a, b + added_lines) if b >= start else (a, b)
+                for a, b in self._tagged_ranges
+            ]
+        self._dirty_lines.update(range(start, start + added_lines + 1))
+
+    def _track_delete(self, first, last=None):
+        if self._full_pass:
+            return
+        if last is None:
+            last = f"{self._call_orig('index', first)}+1c"
+
+        if self._compare(first, '<=', '1.0') and self._compare(last, '>=', 'end-1c'):
+            self._full_pass = True
+            self._dirty_lines.clear()
+            return
+
+        start = self._line_of(first)
+        end = self._line_of(last)
+        if end > start:
+            removed = end - start
+            self._dirty_lines = {
+                n - removed if n > end else min(n, start)
+                for n in self._dirty_lines
+            }
+            self._tagged_ranges = [
+                (a - removed if a > end else min(a, start), b - removed if b > end else min(b, start))
+                for a, b in self._tagged_ranges
+            ]
+        self._dirty_lines.add(start)
+
+    def _compare(self, index1, op, index2):
+        return self.text_widget.tk.getboolean(self._call_orig('compare', index1, op, index2))
+
+    def _shift_dirty(self, line, delta):
+        if self._dirty_lines:
+            self._dirty_lines = {n + delta if n > line else n for n in self._dirty_lines}
+
+    def _removable_tags(self):
+        return [tag for tag in self.text_widget.tag_names() if tag not in ['sel', 'error', 'warning']]
+
+    def highlight_changes(self):
+        if not self.incremental or self._full_pass:
+            self.highlight()
+            return
+
+        if self._dirty_lines:
+            dirty_lines = sorted(self._dirty_lines)
+            self._dirty_lines.clear()
+
+            tags = self._removable_tags()
+            last_line = self._last_line()
+
+            for line_num in dirty_lines:
+                if line_num > last_line:
+                    break
+                if self._lazy_active and not self._is_tagged(line_num):
+                    continue
+                line_start = f"{line_num}.0"
+                line_end = f"{line_num}.end"
+                for tag in tags:
+                    self.text_widget.tag_remove(tag, line_start, line_end)
+                self.highlight_line(self.text_widget.get(line_start, line_end), line_num)
+
+        if self._lazy_active:
+            self.highlight_visible()
+
     def highlight(self):
-        for tag in self.text_widget.tag_names():
-            if tag not in ['sel', 'error', 'warning']:
-                self.text_widget.tag_remove(tag, '1.0', tk.END)
+        self._full_pass = False
+        self._dirty_lines.clear()
+        self._tagged_ranges = []
+
+        for tag in self._removable_tags():
+            self.text_widget.tag_remove(tag, '1.0', tk.END)
+
+        if self.lazy is None:
+            self._lazy_active = self._last_line() > self.LAZY_THRESHOLD
+        else:
+            self._lazy_active = self.lazy
+
+        if self._lazy_active:
+            self.highlight_visible()
+            return
 
         text = self.text_widget.get('1.0', tk.END)
         lines = text.split('\n')
 
         for line_num, line in enumerate(lines, 1):
             self.highlight_line(line, line_num)
-    
-    def highlight_line(self, line, line_num):
-        if not line.strip():
-            return
 
-        line_start = f"{line_num}.0"
-        line_end = f"{line_num}.{len(line)}"
-
-        if line.startswith('Windows Registry Editor Version'):
-            self.text_widget.tag_add('version', line_start, line_end)
-        elif line.strip().startswith(';'):
-            self.text_widget.tag_add('comment', line_start, line_end)
-        elif line.startswith('[') and line.endswith(']'):
-            self.text_widget.tag_add('header', line_start, line_end)
-            self.highlight_brackets(line, line_num)
-        elif '=' in line:
-            self.highlight_key_value(line, line_num)
-    
-    def highlight_brackets(self, line, line_num):
-        open_bracket = line.find('[')
-        close_bracket = line.find(']')
+    @property
+    def lazy_active(self):
+        return self._lazy_active
 
-        if open_bracket != -1:
-            self.text_widget.tag_add('brackets', f"{line_num}.{open_bracket}", f"{line_num}.{open_bracket + 1}")
+    def visible_lines(self):
+        first = self._line_of('@0,0')
+        last = self._line_of(f"@0,{self.text_widget.winfo_height()}")
+        return first, last
 
-        if close_bracket != -1:
-            self.text_widget.tag_add('brackets', f"{line_num}.{close_bracket}", f"{line_num}.{close_bracket + 1}")
-    
-    def highlight_key_value(self, line, line_num):
-        if '=' not in line:
-            return
+    def highlight_visible(self):
+        first, last = self.visible_lines()
+        first = max(1, first - self.LAZY_MARGIN)
+        last = min(self._last_line(), last + self.LAZY_MARGIN)
 
-        key_part, value_part = line.split('=', 1)
-        key_start = line.find('"')
-        key_end = line.find('"', key_start + 1) + 1 if key_start != -1 else -1
+        for start, end in self._untagged_ranges(first, last):
+            self.highlight_range(start, end)
 
-        if key_start != -1 and key_end != -1:
-            self.text_widget.tag_add('string_key', f"{line_num}.{key_start}", f"{line_num}.{key_end}")
+    def highlight_range(self, start, end):
+        range_start = f"{start}.0"
+        range_end = f"{end}.end"
+        for tag in self._removable_tags():
+            self.text_widget.tag_remove(tag, range_start, range_end)
 
-        operator_pos = line.find('=')
+        text = self.text_widget.get(range_start, range_end)
+        for offset, line in enumerate(text.split('\n')):
+            self.highlight_line(line, start + offset)
 
-        if operator_pos != -1:
-            self.text_widget.tag_add('operator', f"{line_num}.{operator_pos}", f"{line_num}.{operator_pos + 1}")
+        self._mark_tagged(start, end)
 
-        value_start = operator_pos + 1
+    def _is_tagged(self, line_num):
+        return any(a <= line_num <= b for a, b in self._tagged_ranges)
 
-        if value_start < len(line):
-            value_text = line[value_start:]
+    def _untagged_ranges(self, first, last):
+        gaps = []
+        cursor = first
+        for a, b in self._tagged_ranges:
+            if b < cursor:
+                continue
+            if a > last:
+                break
+            if a > cursor:
+                gaps.append((cursor, a - 1))
+            cursor = max(cursor, b + 1)
+            if cursor > last:
+                break
+        if cursor <= last:
+            gaps.append((cursor, last))
+        return gaps
+
+    def _mark_tagged(self, start, end):
+        merged = []
+        for a, b in sorted(self._tagged_ranges + [(start, end)]):
+            if merged and a <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+            else:
+                merged.append((a, b))
+        self._tagged_ranges = merged
 
-            if value_text.strip().startswith('"') and value_text.strip().endswith('"'):
-                value_start_abs = value_start + value_text.find('"')
-                value_end_abs = value_start + value_text.rfind('"') + 1
-                self.text_widget.tag_add('string_value', f"{line_num}.{value_start_abs}", f"{line_num}.{value_end_abs}")
-                inner_value = value_text.strip('" ')
-                self.highlight_value_content(inner_value, line_num, value_start_abs + 1)
-    
-    def highlight_value_content(self, value, line_num, start_offset):
-        rgb_pattern = r'\b\d{1,3}\s+\d{1,3}\s+\d{1,3}\b'
-        for match in re.finditer(rgb_pattern, value):
-            rgb_start = start_offset + match.start()
-            rgb_end = start_offset + match.end()
-            self.text_widget.tag_add('rgb_values', f"{line_num}.{rgb_start}", f"{line_num}.{rgb_end}")
-
-        hex_pattern = r'#[0-9a-fA-F]{6}'
-        for match in re.finditer(hex_pattern, value):
-            hex_start = start_offset + match.start()
-            hex_end = start_offset + match.end()
-            self.text_widget.tag_add('hex_value', f"{line_num}.{hex_start}", f"{line_num}.{hex_end}")
+    def highlight_line(self, line, line_num):
+        for tag, start, end in lex_line(line).tokens:
+            self.text_widget.tag_add(tag, f"{line_num}.{start}", f"{line_num}.{end}")
 
     def clear_highlighting(self):
         for tag in self.text_widget.tag_names():
@@ -162,7 +365,6 @@ class RegSyntaxHighlighter:
     
     def validate_syntax(self):
         text = self.text_widget.get('1.0', tk.END)
-        lines = text.split('\n')
         errors = []
         warnings = []
 
@@ -173,28 +375,20 @@ class RegSyntaxHighlighter:
         has_header = False
         has_entries = False
 
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line:
-                continue
-
-            if line.startswith('Windows Registry Editor Version'):
+        for line_num, lexed in lex(text):
+            if lexed.kind == VERSION:
                 has_version = True
-                if not re.match(r'^Windows Registry Editor Version \d+\.\d+$', line):
-                    errors.append(f"Line {line_num}: Invalid version format")
-                    self.mark_error(line_num, 0, len(line))
-            elif line.startswith('[') and line.endswith(']'):
+            elif lexed.kind == HEADER:
                 has_header = True
-                if not re.match(r'^\[[^\]]+\]$', line):
-                    errors.append(f"Line {line_num}: Invalid registry header format")
-                    self.mark_error(line_num, 0, len(line))
-            elif '=' in line and not line.startswith(';'):
+            elif lexed.kind == ENTRY:
                 has_entries = True
-                if not self.validate_key_value(line, line_num):
-                    errors.append(f"Line {line_num}: Invalid key-value format")
-            elif not line.startswith(';'):
-                errors.append(f"Line {line_num}: Invalid syntax")
-                self.mark_error(line_num, 0, len(line))
+
+            for severity, start, end, message in lexed.problems:
+                if severity == 'error':
+                    errors.append(f"Line {line_num}: {message}")
+                    self.mark_error(line_num, start, end)
+                else:
+                    self.mark_warning(line_num, start, end)
 
         if not has_version:
             warnings.append("Missing 'Windows Registry Editor Version' header")
@@ -207,34 +401,6 @@ class RegSyntaxHighlighter:
 
         return len(errors) == 0, errors, warnings
 
-    def validate_key_value(self, line, line_num):
-        try:
-            key_part, value_part = line.split('=', 1)
-            key = key_part.strip()
-            value = value_part.strip()
-
-            if not (key.startswith('"') and key.endswith('"')):
-                self.mark_error(line_num, 0, len(key_part))
-                return False
-
-            if not (value.startswith('"') and value.endswith('"')):
-                self.mark_error(line_num, len(key_part) + 1, len(line))
-                return False
-
-            inner_value = value.strip('"')
-
-            if re.match(r'^\d{1,3}\s+\d{1,3}\s+\d{1,3}$', inner_value):
-                rgb_values = inner_value.split()
-                for val in rgb_values:
-                    if not (0 <= int(val) <= 255):
-                        self.mark_warning(line_num, line.find(inner_value), line.find(inner_value) + len(inner_value))
-                        return True
-                    
-            return True
-        except Exception:
-            self.mark_error(line_num, 0, len(line))
-            return False
-    
     def mark_error(self, line_num, start_pos, end_pos):
         self.text_widget.tag_add('error', 
                                f"{line_num}.{start_pos}", 
@@ -247,9 +413,10 @@ class RegSyntaxHighlighter:
 
 
 class LineNumbers(tk.Canvas):
-    def __init__(self, parent, text_widget, **kwargs):
+    def __init__(self, parent, text_widget, scheduler=None, **kwargs):
         super().__init__(parent, **kwargs)
         self.text_widget = text_widget
+        self.scheduler = scheduler
         self.configure(
             width=60,
             bg='#1e1e1e',
@@ -259,12 +426,13 @@ class LineNumbers(tk.Canvas):
         
         self.font = ('Consolas', 10)
         
-        self.text_widget.bind('<KeyPress>', self._on_change)
-        self.text_widget.bind('<KeyRelease>', self._on_change)
-        self.text_widget.bind('<Button-1>', self._on_change)
-        self.text_widget.bind('<MouseWheel>', self._on_change)
-        self.text_widget.bind('<Configure>', self._on_change)
-        self.text_widget.bind('<<Modified>>', self._on_change)
+        if self.scheduler:
+            self.scheduler.register('line_numbers', self.update_line_numbers)
+
+        for sequence in ('<KeyPress>', '<KeyRelease>', '<Button-1>', '<MouseWheel>', '<Configure>'):
+            self.text_widget.bind(sequence, self._on_change, add='+')
+        if not self.scheduler:
+            self.text_widget.bind('<<Modified>>', self._on_change, add='+')
         
         self.bind('<Button-1>', self._on_click)
         
@@ -330,7 +498,13 @@ class LineNumbers(tk.Canvas):
             print(f"Error selecting line {line_num}: {e}")
     
     def _on_change(self, event=None):
-        self.update_line_numbers()
+        self.request_update()
+
+    def request_update(self):
+        if self.scheduler:
+            self.scheduler.mark_dirty('line_numbers')
+        else:
+            self.update_line_numbers()
         
     def update_line_numbers(self):
         self.delete("all")
@@ -375,10 +549,13 @@ class LineNumbers(tk.Canvas):
 
 
 class RegTextWidget(ttk.Frame):
-    def __init__(self, parent, **kwargs):
+    def __init__(self, parent, incremental=True, lazy=None, **kwargs):
         super().__init__(parent, **kwargs)
+        self.incremental = incremental
+        self.lazy = lazy
         self.highlighter = None
         self.line_numbers = None
+        self.scheduler = None
         self.create_widgets()
     
     def create_widgets(self):
@@ -404,15 +581,18 @@ class RegTextWidget(ttk.Frame):
         )
         self.text_widget.grid(row=0, column=1, sticky="nsew")
 
-        self.line_numbers = LineNumbers(self.line_number_frame, self.text_widget)
+        self.scheduler = RepaintScheduler(self.text_widget)
+        self.highlighter = RegSyntaxHighlighter(
+            self.text_widget, incremental=self.incremental, scheduler=self.scheduler, lazy=self.lazy
+        )
+
+        self.line_numbers = LineNumbers(self.line_number_frame, self.text_widget, scheduler=self.scheduler)
         self.line_numbers.pack(side="left", fill="y")
 
         v_scrollbar.config(command=self.text_widget.yview)
         h_scrollbar.config(command=self.text_widget.xview)
 
-        self.highlighter = RegSyntaxHighlighter(self.text_widget)
-        
-        self.text_widget.bind('<<Modified>>', self._on_modified)
+        self.text_widget.bind('<<Modified>>', self._on_modified, add='+')
         self.text_widget.bind('<Control-l>', self._select_current_line)
         self.text_widget.bind('<Control-L>', self._select_current_line)
     
@@ -421,13 +601,23 @@ class RegTextWidget(ttk.Frame):
         if v_scrollbar:
             v_scrollbar[0].set(first, last)
         
-        self.line_numbers.update_line_numbers()
+        self.line_numbers.request_update()
+        if self.highlighter and self.highlighter.lazy_active:
+            self.highlighter.request_highlight()
     
     def _on_modified(self, event=None):
         if self.text_widget.edit_modified():
-            self.highlighter.highlight()
-            self.line_numbers.update_line_numbers()
+            self.request_repaint()
             self.text_widget.edit_modified(False)
+
+    def request_repaint(self):
+        self.scheduler.mark_dirty('highlight', 'line_numbers')
+
+    def flush_repaint(self):
+        self.scheduler.flush()
+
+    def repaint_stats(self):
+        return self.scheduler.stats()
     
     def _select_current_line(self, event=None):
         current_line = self.text_widget.index('insert').split('.')[0]
@@ -444,20 +634,18 @@ class RegTextWidget(ttk.Frame):
         else:
             self.text_widget.insert(index, text)
 
-        self.highlighter.highlight()
-        self.line_numbers.update_line_numbers()
+        self.request_repaint()
     
     def delete(self, start, end=None):
         self.text_widget.delete(start, end)
-        self.highlighter.highlight()
-        self.line_numbers.update_line_numbers()
+        self.request_repaint()
     
     def get(self, start, end=None):
         return self.text_widget.get(start, end)
 
     def clear(self):
         self.text_widget.delete('1.0', tk.END)
-        self.line_numbers.update_line_numbers()
+        self.request_repaint()
     
     def configure_text(self, **kwargs):
         self.text_widget.configure(**kwargs)
@@ -0,0 +1,168 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+VERSION_PREFIX = 'Windows Registry Editor Version'
+
+VERSION_RE = re.compile(r'Windows Registry Editor Version \d+\.\d+')
+HEADER_RE = re.compile(r'\[[^\]]+\]')
+QUOTED_KEY_RE = re.compile(r'\s*"[^"\\]*(?:\\.[^"\\]*)*"')
+ENTRY_RE = re.compile(r'\s*("([^"\\]*(?:\\.[^"\\]*)*)")[ \t]*(=)[ \t]*("(.*)")\s*')
+VALUE_TOKEN_RE = re.compile(r'(?P<rgb_values>\b\d{1,3}\s+\d{1,3}\s+\d{1,3}\b)|(?P<hex_value>#[0-9a-fA-F]{6})')
+RGB_VALUE_RE = re.compile(r'\d{1,3}\s+\d{1,3}\s+\d{1,3}')
+OUT_OF_RANGE_RE = re.compile(r'\b(?:25[6-9]|2[6-9]\d|[3-9]\d\d)\b')
+HEX_BYTES = r'(?:[0-9a-fA-F]{2}(?:\s*,\s*[0-9a-fA-F]{2})*)?(?:\s*,?\s*\\)?'
+TYPED_VALUE_RE = re.compile(r'(dword):[0-9a-fA-F]{1,8}|(hex(?:\([0-9a-fA-F]+\))?):' + HEX_BYTES + r'|(-)')
+CONTINUATION_RE = re.compile(r'\s*' + HEX_BYTES + r'\s*')
+
+BLANK = 'blank'
+VERSION = 'version'
+COMMENT = 'comment'
+HEADER = 'header'
+ENTRY = 'entry'
+CONTINUATION = 'continuation'
+INVALID = 'invalid'
+
+Token = namedtuple('Token', ['tag', 'start', 'end'])
+Problem = namedtuple('Problem', ['severity', 'start', 'end', 'message'])
+LexedLine = namedtuple('LexedLine', ['kind', 'tokens', 'problems', 'key', 'value', 'value_type'], defaults=[None])
+
+_BLANK_LINE = LexedLine(BLANK, (), (), None, None)
+
+
+@lru_cache(maxsize=16384)
+def lex_line(line):
+    stripped = line.strip()
+    if not stripped:
+        return _BLANK_LINE
+
+    start = len(line) - len(line.lstrip())
+    end = start + len(stripped)
+
+    if stripped.startswith(VERSION_PREFIX):
+        problems = ()
+        if not VERSION_RE.fullmatch(stripped):
+            problems = (Problem('error', start, end, "Invalid version format"),)
+        return LexedLine(VERSION, (Token('version', start, end),), problems, None, None)
+
+    if stripped.startswith(';'):
+        return LexedLine(COMMENT, (Token('comment', start, end),), (), None, None)
+
+    if stripped.startswith('[') and stripped.endswith(']'):
+        close = line.find(']')
+        tokens = (
+            Token('header', start, end),
+            Token('brackets', start, start + 1),
+            Token('brackets', close, close + 1),
+        )
+        problems = ()
+        if not HEADER_RE.fullmatch(stripped):
+            problems = (Problem('error', start, end, "Invalid registry header format"),)
+        return LexedLine(HEADER, tokens, problems, stripped[1:-1], None)
+
+    if '=' in stripped:
+        return _lex_entry(line, start, end)
+
+    return LexedLine(INVALID, (), (Problem('error', start, end, "Invalid syntax"),), None, None)
+
+
+def _lex_entry(line, start, end):
+    match = ENTRY_RE.fullmatch(line)
+    if match:
+        return _lex_quoted_entry(line, match)
+
+    key_match = QUOTED_KEY_RE.match(line)
+    operator = line.find('=', key_match.end() if key_match else 0)
+    if operator == -1:
+        operator = line.find('=')
+
+    tokens = []
+    key_part = line[:operator]
+    key = key_part.strip()
+    key_start = start
+
+    key_is_quoted = len(key) >= 2 and key.startswith('"') and key.endswith('"')
+    if key_is_quoted or key == '@':
+        tokens.append(Token('string_key', key_start, key_start + len(key)))
+    tokens.append(Token('operator', operator, operator + 1))
+
+    value_part = line[operator + 1:]
+    value = value_part.strip()
+    value_start = operator + 1 + len(value_part) - len(value_part.lstrip())
+
+    value_is_quoted = len(value) >= 2 and value.startswith('"') and value.endswith('"')
+    typed_match = None if value_is_quoted else TYPED_VALUE_RE.fullmatch(value)
+    inner = value[1:-1] if value_is_quoted else value
+    value_type = 'string' if value_is_quoted else None
+
+    if value_is_quoted:
+        tokens.append(Token('string_value', value_start, value_start + len(value)))
+        tokens.extend(_value_tokens(inner, value_start + 1))
+    elif typed_match:
+        value_type = next(group for group in typed_match.groups() if group)
+        value_type = 'delete' if value_type == '-' else value_type
+        tokens.append(Token('hex_value', value_start, value_start + len(value)))
+
+    problems = ()
+    if not key_is_quoted and key != '@':
+        problems = (Problem('error', start, operator, "Invalid key-value format"),)
+    elif not value_is_quoted and not typed_match:
+        problems = (Problem('error', operator + 1, end, "Invalid key-value format"),)
+    elif value_is_quoted and RGB_VALUE_RE.fullmatch(inner) and OUT_OF_RANGE_RE.search(inner):
+        inner_start = value_start + 1
+        problems = (Problem('warning', inner_start, inner_start + len(inner), None),)
+
+    return LexedLine(ENTRY, tuple(tokens), problems, key[1:-1] if key_is_quoted else key, inner, value_type)
+
+
+def _lex_quoted_entry(line, match):
+    operator = match.start(3)
+    inner = match.group(5)
+    inner_start = match.start(5)
+    tokens = [
+        Token('string_key', match.start(1), match.end(1)),
+        Token('operator', operator, operator + 1),
+        Token('string_value', match.start(4), match.end(4)),
+    ]
+
+    problems = ()
+    if RGB_VALUE_RE.fullmatch(inner):
+        tokens.append(Token('rgb_values', inner_start, inner_start + len(inner)))
+        if OUT_OF_RANGE_RE.search(inner):
+            problems = (Problem('warning', inner_start, inner_start + len(inner), None),)
+    else:
+        tokens.extend(_value_tokens(inner, inner_start))
+
+    return LexedLine(ENTRY, tuple(tokens), problems, match.group(2), inner, 'string')
+
+
+def _value_tokens(inner, offset):
+    return [
+        Token(match.lastgroup, offset + match.start(), offset + match.end())
+        for match in VALUE_TOKEN_RE.finditer(inner)
+    ]
+
+
+@lru_cache(maxsize=4096)
+def lex_continuation(line):
+    stripped = line.strip()
+    start = len(line) - len(line.lstrip())
+    end = start + len(stripped)
+
+    if CONTINUATION_RE.fullmatch(line):
+        tokens = (Token('hex_value', start, end),) if stripped else ()
+        return LexedLine(CONTINUATION, tokens, (), None, stripped)
+
+    return LexedLine(CONTINUATION, (), (Problem('error', start, end, "Invalid hex continuation"),), None, stripped)
+
+
+def continues(line, lexed):
+    return lexed.kind in (ENTRY, CONTINUATION) and not lexed.problems and line.rstrip().endswith('\\')
+
+
+def lex(text):
+    continued = False
+    for line_num, line in enumerate(text.split('\n'), 1):
+        lexed = lex_continuation(line) if continued else lex_line(line)
+        continued = continues(line, lexed)
+        yield line_num, lexed
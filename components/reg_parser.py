@@ -0,0 +1,154 @@
+import re
+from collections import namedtuple
+
+from components.reg_lexer import lex_line, HEADER, ENTRY
+
+COLORS_SECTION = 'HKEY_CURRENT_USER\\Control Panel\\Colors'
+
+RegRecord = namedtuple('RegRecord', ['section', 'key', 'value', 'kind'])
+
+_ESCAPE_RE = re.compile(r'\\(.)')
+_HEX_DIGITS_RE = re.compile(r'[^0-9a-fA-F]')
+
+
+def detect_encoding(path):
+    with open(path, 'rb') as f:
+        head = f.read(4096)
+
+    if head.startswith(b'\xff\xfe') or head.startswith(b'\xfe\xff'):
+        return 'utf-16'
+    if head.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    if b'\x00' in head:
+        return 'utf-16-le'
+
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        if e.start < len(head) - 3:
+            return 'cp1252'
+    return 'utf-8'
+
+
+def read_reg_file(path):
+    with open(path, 'r', encoding=detect_encoding(path), errors='replace') as f:
+        return f.read()
+
+
+def decode_value(value, value_type):
+    if value_type == 'string':
+        return _ESCAPE_RE.sub(r'\1', value)
+    if value_type == 'delete':
+        return None
+    if value_type == 'dword':
+        return int(value.split(':', 1)[1], 16)
+    return bytes.fromhex(_HEX_DIGITS_RE.sub('', value.split(':', 1)[1]))
+
+
+def logical_lines(lines):
+    pending = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if pending is not None:
+            line = pending + line.strip()
+            pending = None
+
+        stripped = line.rstrip()
+        if stripped.endswith('\\') and not stripped.lstrip().startswith(';'):
+            pending = stripped[:-1]
+            continue
+
+        yield line
+
+    if pending is not None:
+        yield pending
+
+
+def parse_reg_lines(lines):
+    section = None
+    for line in logical_lines(lines):
+        lexed = lex_line(line)
+
+        if lexed.kind == HEADER and not lexed.problems:
+            section = lexed.key
+            if section.startswith('-'):
+                section = section[1:]
+                yield RegRecord(section, None, None, 'delete_section')
+            continue
+
+        if lexed.kind != ENTRY or any(problem.severity == 'error' for problem in lexed.problems):
+            continue
+
+        try:
+            value = decode_value(lexed.value, lexed.value_type)
+        except ValueError:
+            continue
+        yield RegRecord(section, lexed.key, value, lexed.value_type)
+
+
+def parse_reg_text(text):
+    return parse_reg_lines(text.splitlines())
+
+
+def parse_reg_file(path):
+    with open(path, 'r', encoding=detect_encoding(path), errors='replace') as f:
+        yield from parse_reg_lines(f)
+
+
+def is_colors_section(section):
+    return section is not None and 'control panel\\colors' in section.lower()
+
+
+def colors_from_records(records, include_unsectioned=False):
+    colors = {}
+    for record in records:
+        if record.kind != 'string':
+            continue
+        if is_colors_section(record.section) or (include_unsectioned and record.section is None):
+            colors[record.key] = record.value
+    return colors
+
+
+def theme_from_records(records):
+    colors = {}
+    extra = 0
+    for record in records:
+        if is_colors_section(record.section) and record.kind in ('string', 'delete'):
+            colors[record.key] = record.value
+        else:
+            extra += 1
+    return colors, extra
+
+
+def _escape_reg_string(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def format_colors_reg(colors):
+    lines = ["Windows Registry Editor Version 5.00", "", f"[{COLORS_SECTION}]"]
+    for key, value in colors.items():
+        if value is None:
+            lines.append(f'"{_escape_reg_string(key)}"=-')
+        else:
+            lines.append(f'"{_escape_reg_string(key)}"="{_escape_reg_string(value)}"')
+    return '\n'.join(lines) + '\n'
+
+
+def parse_rgb(value):
+    parts = value.split()
+    if len(parts) != 3:
+        return None
+    try:
+        rgb = tuple(int(part) for part in parts)
+    except ValueError:
+        return None
+    if not all(0 <= channel <= 255 for channel in rgb):
+        return None
+    return rgb
+
+
+def rgb_to_hex(value):
+    rgb = parse_rgb(value)
+    if rgb is None:
+        return None
+    return "#{:02X}{:02X}{:02X}".format(*rgb)
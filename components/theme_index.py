@@ -0,0 +1,209 @@
+import os
+import json
+import hashlib
+import threading
+
+from components.reg_parser import parse_reg_text, theme_from_records, read_reg_file
+from components.key_schema import get_schema, KEYS_PATH
+
+INDEX_FILENAME = '.vineyard-index.json'
+INDEX_VERSION = 2
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def content_digest(content):
+    return hashlib.sha1(content.encode('utf-8', errors='replace')).hexdigest()
+
+
+def list_theme_files(themes_path):
+    try:
+        names = os.listdir(themes_path)
+    except FileNotFoundError:
+        return []
+    return [name for name in names if name.endswith('.reg') and name != 'revert.reg']
+
+
+class ThemeIndex:
+    def __init__(self, themes_path, keys_path=KEYS_PATH):
+        self.themes_path = themes_path
+        self.keys_path = keys_path
+        self.schema = get_schema(keys_path)
+        self.index_path = os.path.join(themes_path, INDEX_FILENAME)
+        self.entries = {}
+        self._keys_signature = None
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get('version') != INDEX_VERSION:
+            return
+
+        self.entries = data.get('themes', {})
+        self._keys_signature = data.get('keys_signature')
+
+    def save(self):
+        if not self._dirty:
+            return
+
+        data = {
+            'version': INDEX_VERSION,
+            'keys_signature': self._keys_signature,
+            'themes': self.entries,
+        }
+        tmp_path = self.index_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def sync_keys(self):
+        self.schema.refresh()
+        if self.schema.signature != self._keys_signature:
+            self._keys_signature = self.schema.signature
+            for entry in self.entries.values():
+                entry['unknown_keys'] = self._unknown_keys(entry['colors'])
+                entry.pop('problems', None)
+            self._dirty = True
+        return self.schema.normalized
+
+    def _unknown_keys(self, colors):
+        return self.schema.unknown_keys(colors)
+
+    def _stat(self, name):
+        try:
+            stat = os.stat(os.path.join(self.themes_path, name))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def is_fresh(self, name, stat=None):
+        entry = self.entries.get(name)
+        stat = stat or self._stat(name)
+        return entry is not None and stat is not None and (entry['mtime_ns'], entry['size']) == stat
+
+    def _index_file(self, name, stat):
+        path = os.path.join(self.themes_path, name)
+        content = read_reg_file(path)
+        digest = content_digest(content)
+
+        entry = self.entries.get(name)
+        if entry and entry.get('sha1') == digest:
+            entry['mtime_ns'], entry['size'] = stat
+            self._dirty = True
+            return entry
+
+        colors, extra = theme_from_records(parse_reg_text(content))
+        return self.store(name, stat, digest, colors, extra)
+
+    def store(self, name, stat, digest, colors, extra=0, problems=None):
+        entry = {
+            'mtime_ns': stat[0],
+            'size': stat[1],
+            'sha1': digest,
+            'colors': colors,
+            'extra': extra,
+            'unknown_keys': self._unknown_keys(colors),
+        }
+        if problems is not None:
+            entry['problems'] = problems
+        self.entries[name] = entry
+        self._dirty = True
+        return entry
+
+    def store_problems(self, name, digest, problems):
+        entry = self.entries.get(name)
+        if entry is None or digest is None or entry['sha1'] != digest:
+            return False
+        if entry.get('problems') != problems:
+            entry['problems'] = problems
+            self._dirty = True
+        return True
+
+    def cached_problems(self, name, stat):
+        if not self.is_fresh(name, stat):
+            return None
+        return self.entries[name].get('problems')
+
+    def refresh(self, names=None):
+        self.sync_keys()
+        full_scan = names is None
+        names = list_theme_files(self.themes_path) if full_scan else names
+
+        added = []
+        updated = []
+        removed = []
+        for name in names:
+            stat = self._stat(name)
+            if stat is None:
+                if name in self.entries:
+                    removed.append(name)
+                continue
+            if self.is_fresh(name, stat):
+                continue
+            is_new = name not in self.entries
+            try:
+                self._index_file(name, stat)
+            except OSError:
+                continue
+            (added if is_new else updated).append(name)
+
+        if full_scan:
+            current = set(names)
+            removed.extend(name for name in self.entries if name not in current)
+
+        for name in removed:
+            del self.entries[name]
+        if removed:
+            self._dirty = True
+
+        self.save()
+        return added, updated, removed
+
+    def get(self, name):
+        self.sync_keys()
+        stat = self._stat(name)
+        if stat is None:
+            if self.entries.pop(name, None) is not None:
+                self._dirty = True
+                self.save()
+            return None
+
+        if self.is_fresh(name, stat):
+            return self.entries[name]
+
+        try:
+            entry = self._index_file(name, stat)
+        except OSError:
+            entry = None
+            if self.entries.pop(name, None) is not None:
+                self._dirty = True
+        self.save()
+        return entry
+
+    def forget(self, name):
+        if self.entries.pop(name, None) is not None:
+            self._dirty = True
+            self.save()
+
+
+def get_index(themes_path, keys_path=KEYS_PATH):
+    key = (os.path.abspath(themes_path), os.path.abspath(keys_path))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = ThemeIndex(themes_path, keys_path)
+        return index
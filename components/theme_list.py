@@ -1,13 +1,24 @@
 from customtkinter import *
 import os
-import subprocess
+import time
+import queue
 import threading
-import json
+from components.theme_index import get_index, list_theme_files
+from components.virtual_list import VirtualList
+from components.theme_watcher import ThemeWatcher
+from components.theme_search import SearchIndex
+from components.wine_session import ApplyError
+from components.apply_backend import apply_colors, undo_last_apply, full_import_warning, DEFAULT_BACKEND
+from components.undo_stack import get_undo_stack
+from components.apply_queue import get_queue, SUPERSEDED, CANCELLED
 
 THEMES_PATH = os.path.join(os.getcwd(), 'themes')
+PALETTE_PREFIXES = ('like:', 'color:', 'is:', '#')
+PALETTE_RESULTS = 25
+WATCH_POLL_INTERVAL = 100
 
 class ThemeList:
-    def __init__(self, parent, console):
+    def __init__(self, parent, console, load=True):
         self.console = console
         self.frame = CTkFrame(parent)
         self.frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -15,51 +26,149 @@ class ThemeList:
         self.title_label = CTkLabel(self.frame, text="Available Themes", font=CTkFont(size=20, weight="bold"))
         self.title_label.pack(pady=(0, 10))
         
-        self.scrollable_frame = CTkScrollableFrame(self.frame)
-        self.scrollable_frame.pack(fill="both", expand=True, padx=5, pady=5)
-        
-        self.theme_buttons = {}
+        self.theme_view = VirtualList(self.frame, self.create_theme_row, self.bind_theme_row)
+        self.theme_view.pack(fill="both", expand=True, padx=5, pady=5)
         
+        self.theme_names = []
+        self.query = ""
+        self.theme_index = None
+        self.search_index = SearchIndex(key=self.sort_key)
+        self.palette_index = None
+        self.apply_backend = DEFAULT_BACKEND
+        self.target_prefixes = []
+        self.apply_queue = get_queue()
+        self.undo_stack = get_undo_stack()
+        self.watcher = None
+        self._watched_changes = queue.SimpleQueue()
+        self.validation_cancel = None
+        self.header = None
+
+        if load:
+            self.start()
+        else:
+            self.theme_view.show_message("Loading themes...")
+
+    def start(self):
+        if self.watcher is not None:
+            return
         self.load_themes()
 
+        self.watcher = ThemeWatcher(THEMES_PATH, self._watched_changes.put, on_error=self._on_watcher_error)
+        self.watcher.start()
+        self.frame.after(WATCH_POLL_INTERVAL, self._poll_watcher)
+
     def load_themes(self):
         if not os.path.exists(THEMES_PATH):
             os.makedirs(THEMES_PATH)
             self.console.info(f"Created themes directory at: {THEMES_PATH}")
 
-        themes = sorted([f for f in os.listdir(THEMES_PATH) if f.endswith('.reg') and f != 'revert.reg'], key=lambda x: os.path.splitext(x)[0].lower())
+        if self.theme_index is None:
+            self.theme_index = get_index(THEMES_PATH)
+
+        themes = sorted(list_theme_files(THEMES_PATH), key=self.sort_key)
+        added, updated, removed = self.theme_index.refresh()
+        if added or updated:
+            self.console.debug(f"Indexed {len(added) + len(updated)} new or changed theme(s)")
+
+        self.theme_names = themes
+        self.search_index.rebuild(themes)
+        self.update_view(keep_position=False)
         
         if not themes:
-            no_themes_label = CTkLabel(self.scrollable_frame, text="No themes found. Please add a .reg file to the themes directory to see it here.", font=CTkFont(size=14))
-            no_themes_label.pack(pady=20)
             self.console.warning("No theme files found in themes directory")
             return
         
         self.console.info(f"Found {len(themes)} theme(s) in themes directory")
-        for theme in themes:
-            self.create_theme_button(theme)
 
-    def create_theme_button(self, theme_name):
-        theme_frame = CTkFrame(self.scrollable_frame)
-        theme_frame.pack(fill="x", padx=5, pady=2)
+    def sort_key(self, theme_name):
+        return os.path.splitext(theme_name)[0].lower()
+
+    def update_view(self, keep_position=True):
+        if self.theme_index is None:
+            return
+
+        query = self.query
+        if query.startswith(PALETTE_PREFIXES):
+            visible = self.palette_search(query)
+        elif query:
+            matches = self.search_index.search(query)
+            if len(matches) * 4 < len(self.theme_names):
+                visible = sorted(matches, key=self.sort_key)
+            else:
+                visible = [name for name in self.theme_names if name in matches]
+        else:
+            visible = self.theme_names
+
+        if self.theme_names:
+            self.theme_view.hide_message()
+        else:
+            self.theme_view.show_message("No themes found. Please add a .reg file to the themes directory to see it here.")
+
+        self.theme_view.set_items(visible, keep_position=keep_position)
+
+    def palette_search(self, query):
+        start = time.perf_counter()
+        if self.palette_index is None:
+            try:
+                from components.palette_search import PaletteIndex
+                self.palette_index = PaletteIndex.from_keys_file()
+            except ImportError:
+                self.console.error("Palette search requires numpy (pip install numpy)")
+                return []
+            except (OSError, ValueError) as e:
+                self.console.error(f"Could not load keys.json for palette search: {e}")
+                return []
+
+        self.palette_index.sync(self.theme_index.entries)
+        results = self.palette_index.query(query, PALETTE_RESULTS)
+        if results is None:
+            self.console.warning(f"Unknown palette query: {query}")
+            return []
+
+        known = set(self.theme_names)
+        visible = [name for name, _ in results if name in known]
+        elapsed = (time.perf_counter() - start) * 1000
+        self.console.info(f"Palette query '{query}' matched {len(visible)} theme(s) in {elapsed:.1f} ms")
+        return visible
+
+    def show_similar(self, theme_name):
+        query = f"like:{os.path.splitext(theme_name)[0]}"
+        if self.header is not None:
+            self.header.set_search(query)
+        else:
+            self.filter_themes(query)
+
+    def set_header(self, header):
+        self.header = header
+
+    def create_theme_row(self, parent):
+        row = {}
+        theme_frame = CTkFrame(parent)
         
-        display_name = os.path.splitext(theme_name)[0]
-        name_label = CTkLabel(theme_frame, text=display_name, anchor="w")
+        name_label = CTkLabel(theme_frame, text="", anchor="w")
         name_label.pack(side="left", padx=10, pady=5, fill="x", expand=True)
         
         edit_btn = CTkButton(
             theme_frame,
             text="Edit",
             width=60,
-            command=lambda t=theme_name: self.edit_theme(t)
+            command=lambda: self.edit_theme(row['item'])
         )
         edit_btn.pack(side="right", padx=5, pady=5)
+
+        similar_btn = CTkButton(
+            theme_frame,
+            text="Similar",
+            width=60,
+            command=lambda: self.show_similar(row['item'])
+        )
+        similar_btn.pack(side="right", padx=5, pady=5)
         
         apply_btn = CTkButton(
             theme_frame,
             text="Apply",
             width=60,
-            command=lambda t=theme_name: self.apply_theme(t)
+            command=lambda: self.apply_theme(row['item'])
         )
         apply_btn.pack(side="right", padx=5, pady=5)
         
@@ -69,16 +178,23 @@ class ThemeList:
             width=60,
             fg_color="#d9534f",
             hover_color="#c9302c",
-            command=lambda t=theme_name: self.delete_theme(t)
+            command=lambda: self.delete_theme(row['item'])
         )
         delete_btn.pack(side="right", padx=5, pady=5)
         
-        self.theme_buttons[theme_name] = {
+        row.update({
             'frame': theme_frame,
+            'name_label': name_label,
             'apply_btn': apply_btn,
             'edit_btn': edit_btn,
-            'delete_btn': delete_btn
-        }
+            'delete_btn': delete_btn,
+            'similar_btn': similar_btn,
+            'widgets': [theme_frame, name_label, apply_btn, edit_btn, similar_btn, delete_btn],
+        })
+        return row
+
+    def bind_theme_row(self, row, theme_name):
+        row['name_label'].configure(text=os.path.splitext(theme_name)[0])
     
     def edit_theme(self, theme_name):
         theme_path = os.path.join(THEMES_PATH, theme_name)
@@ -94,121 +210,184 @@ class ThemeList:
     def set_theme_maker(self, theme_maker_instance):
         self.theme_maker = theme_maker_instance
     
-    def read_reg_file(self, path):
-        encodings = ["utf-16", "utf-8", "latin-1", "cp1252"]
+    def apply_theme(self, theme_name):
+        display_name = os.path.splitext(theme_name)[0]
 
-        for enc in encodings:
-            try:
-                if enc == "utf-16":
-                    try:
-                        with open(path, "r", encoding="utf-16") as f:
-                            content = f.read()
-                        return content
-                    except UnicodeError:
-                        with open(path, "rb") as f:
-                            content = f.read()
-                        return content.decode("utf-16-le")
-                else:
-                    with open(path, "r", encoding=enc) as f:
-                        return f.read()
-            except (UnicodeDecodeError, UnicodeError):
-                continue
-            
-        try:
-            with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                return f.read()
-        except:
-            raise ValueError(f"Could not decode {path} with tried encodings {encodings}")
-
-    def convert_reg_to_dict(self, reg_content):
-        reg_dict = {}
-        lines = reg_content.splitlines()
-        current_path = None
-        in_colors_section = False
-
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith(";") or line.startswith("Windows Registry Editor"):
-                continue
-
-            if line.startswith("[") and line.endswith("]"):
-                current_path = line[1:-1]
-                in_colors_section = "Control Panel\\Colors" in current_path
-                continue
-
-            elif '=' in line and in_colors_section:
-                key, value = line.split("=", 1)
-                key = key.strip().strip('"')
-                value = value.strip().strip('"')
-                reg_dict[key] = value
-
-        return reg_dict
-
-    def normalize_key(self, key):
-        return key.strip().lower()
-    
-    def validate_theme(self, theme_dict, allowed_dict, path="root"):
-        if not isinstance(theme_dict, dict):
-            return True
+        self.console.system(f"Validating theme: {display_name}...")
 
-        colors_section = theme_dict
-        if "HKEY_CURRENT_USER" in theme_dict:
-            colors_section = theme_dict["HKEY_CURRENT_USER"]
-            if "Control Panel" in colors_section:
-                colors_section = colors_section["Control Panel"]
-                if "Colors" in colors_section:
-                    colors_section = colors_section["Colors"]
+        entry = self.theme_index.get(theme_name)
+        if entry is None:
+            self.console.error(f"Theme file not found or unreadable: {theme_name}")
+            return
 
-        norm_allowed = {self.normalize_key(k): v for k, v in allowed_dict.items()}
+        if entry['unknown_keys']:
+            self.console.error(f"Unknown key '{entry['unknown_keys'][0]}' at path 'root'")
+            self.console.error(f"Theme {display_name} contains unknown keys. Aborting.")
+            return
 
-        for key, value in colors_section.items():
-            norm_key = self.normalize_key(key)
-            if norm_key not in norm_allowed:
-                self.console.error(f"Unknown key '{key}' at path '{path}'")
-                return False
+        prefixes = self.target_prefixes or [None]
+        colors = dict(entry['colors'])
+        warning = full_import_warning(display_name, colors, entry['extra'], self.apply_backend)
+        source = os.path.join(THEMES_PATH, theme_name) if warning else None
+        if warning:
+            self.console.warning(warning)
+        if len(prefixes) > 1:
+            self.console.system(f"Applying theme: {display_name} to {len(prefixes)} prefixes...")
+        else:
+            self.console.system(f"Applying theme: {display_name}...")
 
-            if isinstance(value, dict):
-                if not self.validate_theme(value, norm_allowed[norm_key], path=f"{path}\\{key}"):
-                    return False
+        busy = sum(self.apply_queue.depth(prefix) for prefix in prefixes)
+        if busy:
+            self.console.info(f"Queued {display_name} behind {busy} job(s); pending applies it replaces are dropped")
 
-        return True
+        def report(job):
+            where = f" [{job.prefix}]" if len(prefixes) > 1 else ""
+            waited = f", waited {job.wait_ms:.0f} ms" if job.wait_ms >= 1 else ""
+            if job.state == SUPERSEDED:
+                self.console.debug(f"Skipped {display_name}{where}: superseded by a newer apply", "apply")
+            elif job.state == CANCELLED:
+                self.console.warning(f"Cancelled applying {display_name}{where}", "apply", job.run_ms)
+            elif isinstance(job.error, ApplyError):
+                self.console.error(f"Failed to apply theme {display_name}{where}: {job.error}", "apply", job.run_ms)
+            elif isinstance(job.error, FileNotFoundError):
+                self.console.error("'wine' command not found. Please ensure Wine is installed and in your PATH.", "apply")
+            elif job.error is not None:
+                self.console.error(f"Unexpected error applying theme{where}: {str(job.error)}", "apply", job.run_ms)
+            elif source is not None:
+                self.console.success(
+                    f"Successfully imported theme file: {display_name}{where} ({job.result[1]:.0f} ms{waited})",
+                    "apply", job.result[1]
+                )
+            elif not job.result[0]:
+                self.console.success(
+                    f"Theme {display_name} is already applied{where}, skipped Wine ({job.result[1]:.0f} ms{waited})",
+                    "apply", job.result[1]
+                )
+            else:
+                self.console.success(
+                    f"Successfully applied theme: {display_name}{where} "
+                    f"({len(job.result[0])} of {len(colors)} colors changed, {job.result[1]:.0f} ms{waited})",
+                    "apply", job.result[1]
+                )
 
-    def apply_theme(self, theme_name):
-        theme_path = os.path.join(THEMES_PATH, theme_name)
-        display_name = os.path.splitext(theme_name)[0]
+        def finished(total):
+            if len(prefixes) > 1:
+                self.console.system(f"Finished applying {display_name} to {len(prefixes)} prefixes ({total:.0f} ms total)", "apply", total)
 
-        self.console.system(f"Validating theme: {display_name}...")
+        self.apply_queue.submit_all(
+            prefixes,
+            display_name,
+            lambda prefix, cancel: apply_colors(colors, self.apply_backend, prefix, cancel, self.undo_stack, display_name, source),
+            report,
+            finished,
+        )
 
-        with open('keys.json', 'r') as f:
-            allowed_keys = json.load(f)
+    def undo_last_apply(self):
+        prefixes = self.target_prefixes or [None]
+        if not any(self.undo_stack.depth(prefix) for prefix in prefixes):
+            self.console.warning("Nothing to undo")
+            return
 
-        reg_content = self.read_reg_file(theme_path)
-        theme_dict = self.convert_reg_to_dict(reg_content)
+        def report(job):
+            where = f" [{job.prefix}]" if len(prefixes) > 1 else ""
+            if job.state == SUPERSEDED:
+                self.console.debug(f"Skipped undo{where}: superseded by a newer job")
+            elif job.state == CANCELLED:
+                self.console.warning(f"Cancelled undo{where}")
+            elif job.error is not None:
+                self.console.error(f"Undo failed{where}: {job.error}", "undo", job.run_ms)
+            elif job.result is None:
+                self.console.info(f"Nothing to undo{where}")
+            else:
+                label, changed, elapsed = job.result
+                self.console.success(f"Undid {label}{where}: restored {len(changed)} color(s) ({elapsed:.0f} ms)", "undo", elapsed)
 
-        if not self.validate_theme(theme_dict, allowed_keys):
-            self.console.error(f"Theme {display_name} contains unknown keys. Aborting.")
+        self.apply_queue.submit_all(
+            prefixes,
+            "undo",
+            lambda prefix, cancel: undo_last_apply(self.undo_stack, self.apply_backend, prefix, cancel),
+            report,
+        )
+
+    def validate_all(self):
+        if self.validation_cancel is not None:
+            self.console.info("Validation is already running")
             return
 
-        self.console.system(f"Applying theme: {display_name}...")
+        from components.theme_validator import validate_in_subprocess
+
+        self.console.system("Validating all themes...")
+        cancel = self.validation_cancel = threading.Event()
+        results = queue.SimpleQueue()
 
-        def run_theme():
+        def report(name, digest, problems, cached):
+            results.put((name, digest, problems))
+            if not problems:
+                return
+            display_name = os.path.splitext(name)[0]
+            self.console.error(f"Theme {display_name} has {len(problems)} problem(s):", "validate")
+            for problem in problems:
+                self.console.error(f"  {problem}", "validate")
+
+        def run():
             try:
-                command = ['wine', 'regedit', theme_path]
-                result = subprocess.run(
-                    command,
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                self.console.success(f"Successfully applied theme: {display_name}")
-            except subprocess.CalledProcessError as e:
-                self.console.error(f"Failed to apply theme {display_name}: {e.stderr}")
-            except FileNotFoundError:
-                self.console.error("'wine' command not found. Please ensure Wine is installed and in your PATH.")
+                summary = validate_in_subprocess(THEMES_PATH, on_result=report, cancel=cancel)
             except Exception as e:
-                self.console.error(f"Unexpected error applying theme: {str(e)}")
+                self.console.error(f"Validation failed: {e}", "validate")
+                return
+            finally:
+                self.validation_cancel = None
 
-        threading.Thread(target=run_theme, daemon=True).start()
+            if summary is None:
+                self.console.warning("Validation cancelled", "validate")
+                return
+
+            valid = summary['total'] - summary['failed']
+            message = (f"{valid} of {summary['total']} theme(s) valid "
+                       f"({summary['checked']} checked, {summary['cached']} unchanged, {summary['ms']:.0f} ms)")
+            if summary['failed']:
+                self.console.warning(message, "validate", summary['ms'])
+            else:
+                self.console.success(message, "validate", summary['ms'])
+
+        thread = threading.Thread(target=run, name="ValidateAll", daemon=True)
+        thread.start()
+        self.frame.after(100, self._poll_validation, thread, results)
+
+    def _poll_validation(self, thread, results):
+        alive = thread.is_alive()
+        if self.theme_index is not None:
+            while True:
+                try:
+                    name, digest, problems = results.get_nowait()
+                except queue.Empty:
+                    break
+                self.theme_index.store_problems(name, digest, problems)
+        if alive:
+            self.frame.after(100, self._poll_validation, thread, results)
+        elif self.theme_index is not None:
+            self.theme_index.save()
+
+    def cancel_validation(self):
+        if self.validation_cancel is None:
+            self.console.info("No validation to stop")
+            return
+        self.validation_cancel.set()
+        self.console.warning("Stopping validation...", "validate")
+
+    def cancel_applies(self):
+        cancelled = self.apply_queue.cancel()
+        if cancelled:
+            self.console.warning(f"Cancelling {cancelled} apply job(s)...")
+        else:
+            self.console.info("No apply jobs to cancel")
+
+    def set_target_prefixes(self, prefixes):
+        self.target_prefixes = list(prefixes)
+        if len(self.target_prefixes) == 1:
+            self.console.info(f"Target prefix: {self.target_prefixes[0]}")
+        else:
+            self.console.info(f"Targeting {len(self.target_prefixes)} prefixes")
 
     def delete_theme(self, theme_name):
         theme_path = os.path.join(THEMES_PATH, theme_name)
@@ -222,37 +401,127 @@ class ThemeList:
         if result:
             try:
                 os.remove(theme_path)
+                self.theme_index.forget(theme_name)
                 self.console.success(f"Deleted theme: {theme_name}")
                 
-                if theme_name in self.theme_buttons:
-                    self.theme_buttons[theme_name]['frame'].destroy()
-                    del self.theme_buttons[theme_name]
+                self.apply_theme_changes(removed=[theme_name])
                     
             except Exception as e:
                 self.console.error(f"Could not delete theme: {str(e)}")
                 messagebox.showerror("Error", f"Could not delete theme: {str(e)}")
 
     def refresh_themes(self):
+        if self.watcher is None:
+            self.start()
+            return
+
+        start = time.perf_counter()
         self.console.system("Refreshing theme list...")
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        
-        self.theme_buttons.clear()
-        self.load_themes()
-        self.console.success("Theme list refreshed successfully")
-    
-    def filter_themes(self, query):
-        query = query.lower()
-    
-        visible_themes = []
-        for theme_name, widgets in self.theme_buttons.items():
-            display_name = os.path.splitext(theme_name)[0].lower()
-            if query in display_name:
-                visible_themes.append((display_name, widgets))
+
+        if not os.path.exists(THEMES_PATH):
+            os.makedirs(THEMES_PATH)
+
+        current = set(list_theme_files(THEMES_PATH))
+        known = set(self.theme_names)
+        _, updated, _ = self.theme_index.refresh()
+
+        added, removed, updated = self.apply_theme_changes(current - known, known - current, updated)
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.console.success(
+            f"Theme list refreshed: {added} added, {removed} removed, {updated} updated ({elapsed:.1f} ms)",
+            "refresh", elapsed
+        )
+
+    def _on_watcher_error(self, error):
+        self.console.error(f"Theme watcher failed: {error}", "watch")
+
+    def _poll_watcher(self):
+        if self.watcher is None:
+            return
+
+        batch = set()
+        try:
+            while True:
+                changed = self._watched_changes.get_nowait()
+                batch = None if changed is None or batch is None else batch | changed
+        except queue.Empty:
+            pass
+
+        if batch is None or batch:
+            try:
+                self.apply_watched_changes(batch)
+            except Exception as e:
+                self.console.error(f"Could not update the theme list: {e}", "watch")
+        self.frame.after(WATCH_POLL_INTERVAL, self._poll_watcher)
+
+    def apply_watched_changes(self, changed):
+        if changed is None:
+            self.refresh_themes()
+            return
+
+        start = time.perf_counter()
+        self.theme_index.refresh(sorted(changed))
+
+        existing = {name for name in changed if os.path.isfile(os.path.join(THEMES_PATH, name))}
+        known = set(self.theme_names)
+        added, removed, updated = self.apply_theme_changes(existing - known, (changed - existing) & known, existing & known)
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.console.info(
+            f"Themes directory changed: {added} added, {removed} removed, {updated} updated ({elapsed:.1f} ms)"
+        )
+
+    def stop_watching(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def apply_theme_changes(self, added=(), removed=(), updated=()):
+        known = set(self.theme_names)
+        added = [name for name in added if name not in known]
+        removed = [name for name in removed if name in known]
+        updated = [name for name in updated if name in known and name not in removed]
+
+        if removed:
+            if len(removed) > 32:
+                removed_set = set(removed)
+                self.theme_names = [name for name in self.theme_names if name not in removed_set]
             else:
-                widgets['frame'].pack_forget()
+                for name in removed:
+                    self.theme_names.remove(name)
+            for name in removed:
+                self.search_index.remove(name)
+
+        if len(added) > 32:
+            self.theme_names = sorted(self.theme_names + added, key=self.sort_key)
+        else:
+            for name in added:
+                self._insert_sorted(name)
+        for name in added:
+            self.search_index.add(name)
 
-        visible_themes.sort(key=lambda x: x[0])
+        if added or removed:
+            self.update_view()
+        if updated:
+            self.theme_view.refresh_items(updated)
 
-        for _, widgets in visible_themes:
-            widgets['frame'].pack(fill="x", padx=5, pady=2)
\ No newline at end of file
+        return len(added), len(removed), len(updated)
+
+    def _insert_sorted(self, theme_name):
+        key = self.sort_key(theme_name)
+        lo, hi = 0, len(self.theme_names)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.sort_key(self.theme_names[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        self.theme_names.insert(lo, theme_name)
+    
+    def filter_themes(self, query):
+        query = query.lower()
+        if query == self.query:
+            return
+        self.query = query
+        self.update_view(keep_position=False)
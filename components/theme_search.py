@@ -0,0 +1,63 @@
+from collections import defaultdict
+
+GRAM_SIZE = 3
+
+
+def grams(text, size=GRAM_SIZE):
+    result = set()
+    for n in range(1, size + 1):
+        for i in range(len(text) - n + 1):
+            result.add(text[i:i + n])
+    return result
+
+
+class SearchIndex:
+    def __init__(self, key=str.lower):
+        self.key = key
+        self._texts = {}
+        self._postings = defaultdict(set)
+
+    def rebuild(self, names):
+        self._texts = {}
+        self._postings = defaultdict(set)
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        if name in self._texts:
+            return
+        text = self.key(name)
+        self._texts[name] = text
+        for gram in grams(text):
+            self._postings[gram].add(name)
+
+    def remove(self, name):
+        text = self._texts.pop(name, None)
+        if text is None:
+            return
+        for gram in grams(text):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(name)
+                if not posting:
+                    del self._postings[gram]
+
+    def search(self, query):
+        query = query.lower()
+        if not query:
+            return set(self._texts)
+
+        if len(query) <= GRAM_SIZE:
+            return set(self._postings.get(query, ()))
+
+        query_grams = sorted(
+            (query[i:i + GRAM_SIZE] for i in range(len(query) - GRAM_SIZE + 1)),
+            key=lambda gram: len(self._postings.get(gram, ())),
+        )
+        candidates = set(self._postings.get(query_grams[0], ()))
+        for gram in query_grams[1:]:
+            if not candidates:
+                break
+            candidates &= self._postings.get(gram, set())
+
+        return {name for name in candidates if query in self._texts[name]}
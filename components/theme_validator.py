@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import sys
+import queue
+import signal
+import threading
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from components.reg_parser import read_reg_file, parse_reg_text, theme_from_records, parse_rgb
+from components.reg_lexer import lex
+from components.key_schema import normalize_key, KEYS_PATH
+from components.theme_index import ThemeIndex, content_digest, list_theme_files
+
+BATCH_SIZE = 32
+POLL_INTERVAL = 0.1
+
+
+def check_content(content, allowed):
+    problems = [
+        f"line {line_num}: {message}"
+        for line_num, lexed in lex(content)
+        for severity, _, _, message in lexed.problems
+        if severity == 'error'
+    ]
+
+    colors, extra = theme_from_records(parse_reg_text(content))
+    if not colors:
+        problems.append("no colors under [HKEY_CURRENT_USER\\Control Panel\\Colors]")
+    for key, value in colors.items():
+        if normalize_key(key) not in allowed:
+            problems.append(f"unknown key '{key}'")
+        elif value is not None and parse_rgb(value) is None:
+            problems.append(f"invalid color '{value}' for '{key}'")
+    return colors, extra, problems
+
+
+def check_theme(path, allowed):
+    return check_content(read_reg_file(path), allowed)[2]
+
+
+def _check_batch(themes_path, names, allowed):
+    results = []
+    for name in names:
+        try:
+            content = read_reg_file(os.path.join(themes_path, name))
+        except OSError as e:
+            results.append((name, None, None, 0, [f"could not read file: {e.strerror or e}"]))
+            continue
+        colors, extra, problems = check_content(content, allowed)
+        results.append((name, content_digest(content), colors, extra, problems))
+    return results
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def validate_themes(themes_path, keys_path=KEYS_PATH, names=None, workers=None,
+                    use_cache=True, on_result=None, cancel=None, save=True):
+    start = time.perf_counter()
+    index = ThemeIndex(themes_path, keys_path)
+    if index.schema.error is not None:
+        raise index.schema.error
+    index.sync_keys()
+
+    names = sorted(list_theme_files(themes_path) if names is None else names, key=str.lower)
+    summary = {'total': len(names), 'checked': 0, 'cached': 0, 'failed': 0, 'cancelled': False}
+
+    def report(name, digest, problems, cached):
+        summary['cached' if cached else 'checked'] += 1
+        if problems:
+            summary['failed'] += 1
+        if on_result is not None:
+            on_result(name, digest, problems, cached)
+
+    stats = {}
+    stale = []
+    for name in names:
+        stat = stats[name] = _stat(os.path.join(themes_path, name))
+        problems = index.cached_problems(name, stat) if use_cache else None
+        if problems is None:
+            stale.append(name)
+        else:
+            report(name, index.entries[name]['sha1'], problems, True)
+
+    def record(results):
+        for name, digest, colors, extra, problems in results:
+            if digest is not None and stats[name] is not None:
+                index.store(name, stats[name], digest, colors, extra, problems)
+            report(name, digest, problems, False)
+
+    batches = [stale[i:i + BATCH_SIZE] for i in range(0, len(stale), BATCH_SIZE)]
+    workers = min(workers or os.cpu_count() or 1, len(batches))
+    allowed = index.schema.normalized
+
+    try:
+        if workers <= 1:
+            for batch in batches:
+                if cancel is not None and cancel.is_set():
+                    summary['cancelled'] = True
+                    break
+                record(_check_batch(themes_path, batch, allowed))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_check_batch, themes_path, batch, allowed) for batch in batches]
+                try:
+                    for future in as_completed(futures):
+                        record(future.result())
+                        if cancel is not None and cancel.is_set():
+                            summary['cancelled'] = True
+                            break
+                finally:
+                    for future in futures:
+                        future.cancel()
+    finally:
+        if save:
+            index.save()
+
+    summary['ms'] = (time.perf_counter() - start) * 1000
+    return summary
+
+
+def _stop_process(process):
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(process.pid, signal.SIGTERM)
+        else:
+            process.terminate()
+        process.wait(timeout=2)
+    except (OSError, subprocess.TimeoutExpired):
+        process.kill()
+        process.wait()
+
+
+def validate_in_subprocess(themes_path, keys_path=KEYS_PATH, on_result=None, cancel=None):
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'vineyard.py')
+    process = subprocess.Popen(
+        [sys.executable, script, '--themes', themes_path, '--keys', keys_path, 'validate', '--jsonl', '--no-save'],
+        stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, encoding='utf-8', errors='replace', start_new_session=True,
+    )
+
+    lines = queue.SimpleQueue()
+
+    def read():
+        for line in process.stdout:
+            lines.put(line)
+        lines.put(None)
+
+    threading.Thread(target=read, name="ValidateReader", daemon=True).start()
+
+    summary = None
+    output = []
+    while True:
+        if cancel is not None and cancel.is_set():
+            _stop_process(process)
+            return None
+        try:
+            line = lines.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            continue
+        if line is None:
+            break
+        try:
+            record = json.loads(line)
+        except ValueError:
+            output.append(line.rstrip())
+            continue
+        if 'summary' in record:
+            summary = record['summary']
+        elif on_result is not None:
+            on_result(record['file'], record.get('sha1'), record['problems'], record['cached'])
+
+    process.wait()
+    if summary is None:
+        raise RuntimeError('\n'.join(output).strip() or f"validator exited with status {process.returncode}")
+    return summary
@@ -0,0 +1,201 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def is_theme_file(name):
+    return name.endswith('.reg') and name != 'revert.reg'
+
+
+def _load_inotify():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class ThemeWatcher:
+    def __init__(self, path, on_changes, debounce=0.3, max_delay=2.0, poll_interval=1.0, use_inotify=True, on_error=None):
+        self.path = path
+        self.on_changes = on_changes
+        self.on_error = on_error
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend = None
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._fd = None
+        self._pending = set()
+        self._rescan = False
+        self._first_event = None
+        self._last_event = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ThemeWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
+
+    def _run(self):
+        if self.use_inotify and self._open_inotify():
+            self.backend = 'inotify'
+            try:
+                self._run_inotify()
+            finally:
+                os.close(self._fd)
+                self._fd = None
+            if self._stop.is_set():
+                return
+
+        self.backend = 'polling'
+        self._run_polling()
+
+    def _open_inotify(self):
+        libc = _load_inotify()
+        if libc is None:
+            return False
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return False
+
+        if libc.inotify_add_watch(fd, os.fsencode(self.path), WATCH_MASK) < 0:
+            os.close(fd)
+            return False
+
+        self._fd = fd
+        return True
+
+    def _run_inotify(self):
+        while not self._stop.is_set():
+            timeout = self.debounce if self._pending or self._rescan else 0.5
+            try:
+                readable, _, _ = select.select([self._fd], [], [], timeout)
+            except (OSError, ValueError):
+                return
+
+            if readable:
+                try:
+                    data = os.read(self._fd, 65536)
+                except OSError as e:
+                    if e.errno == errno.EAGAIN:
+                        continue
+                    return
+                if not self._handle_inotify_events(data):
+                    self._rescan = True
+                    self._flush(force=True)
+                    return
+
+            self._flush()
+
+    def _handle_inotify_events(self, data):
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', errors='surrogateescape')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self._rescan = True
+                self._touch()
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                return False
+            elif is_theme_file(name):
+                self._pending.add(name)
+                self._touch()
+        return True
+
+    def _snapshot(self):
+        snapshot = {}
+        try:
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    if is_theme_file(entry.name):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass
+        return snapshot
+
+    def _run_polling(self):
+        previous = self._snapshot()
+        while not self._stop.wait(self.debounce if self._pending else self.poll_interval):
+            current = self._snapshot()
+            changed = {name for name in previous.keys() | current.keys() if previous.get(name) != current.get(name)}
+            previous = current
+
+            if changed:
+                self._pending.update(changed)
+                self._touch()
+            self._flush()
+
+    def _touch(self):
+        now = time.monotonic()
+        if self._first_event is None:
+            self._first_event = now
+        self._last_event = now
+
+    def _flush(self, force=False):
+        if not self._pending and not self._rescan:
+            return
+
+        now = time.monotonic()
+        quiet = now - self._last_event >= self.debounce
+        overdue = now - self._first_event >= self.max_delay
+        if not (force or quiet or overdue):
+            return
+
+        changed = None if self._rescan else self._pending
+        self._pending = set()
+        self._rescan = False
+        self._first_event = None
+        self._last_event = None
+
+        try:
+            self.on_changes(changed)
+        except Exception as e:
+            if self.on_error is not None:
+                self.on_error(e)
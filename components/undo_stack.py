@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import threading
+
+from components.wine_session import prefix_key
+from components.key_schema import get_schema, KEYS_PATH
+
+MAX_DEPTH = 20
+UNDO_FILENAME = 'undo.json'
+
+
+def state_dir():
+    base = os.environ.get('XDG_STATE_HOME') or os.path.expanduser('~/.local/state')
+    return os.path.join(base, 'vineyard')
+
+
+def known_keys(keys_path=KEYS_PATH):
+    return list(get_schema(keys_path).keys)
+
+
+def default_colors(keys_path=KEYS_PATH):
+    return {key: None for key in known_keys(keys_path)}
+
+
+def restore_target(snapshot, keys):
+    target = {key.lower(): (key, None) for key in keys}
+    for key, value in snapshot.items():
+        target[key.lower()] = (key, value)
+    return dict(target.values())
+
+
+class UndoStack:
+    def __init__(self, path=None, max_depth=MAX_DEPTH):
+        self.path = path or os.path.join(state_dir(), UNDO_FILENAME)
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+        self._stacks = None
+
+    def _load(self):
+        if self._stacks is not None:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._stacks = json.load(f).get('prefixes', {})
+        except (OSError, ValueError, AttributeError):
+            self._stacks = {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'prefixes': self._stacks}, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def push(self, prefix, label, colors):
+        with self._lock:
+            self._load()
+            stack = self._stacks.setdefault(prefix_key(prefix), [])
+            stack.append({'label': label, 'time': time.time(), 'colors': dict(colors)})
+            del stack[:-self.max_depth]
+            self._save()
+
+    def peek(self, prefix):
+        with self._lock:
+            self._load()
+            stack = self._stacks.get(prefix_key(prefix))
+            return dict(stack[-1]) if stack else None
+
+    def pop(self, prefix):
+        with self._lock:
+            self._load()
+            key = prefix_key(prefix)
+            stack = self._stacks.get(key)
+            if not stack:
+                return None
+            snapshot = stack.pop()
+            if not stack:
+                del self._stacks[key]
+            self._save()
+            return snapshot
+
+    def depth(self, prefix):
+        with self._lock:
+            self._load()
+            return len(self._stacks.get(prefix_key(prefix), []))
+
+
+_default_stack = None
+
+
+def get_undo_stack():
+    global _default_stack
+    if _default_stack is None:
+        _default_stack = UndoStack()
+    return _default_stack
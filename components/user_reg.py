@@ -0,0 +1,208 @@
+import os
+import re
+import time
+import tempfile
+
+from components.reg_parser import parse_reg_file, is_colors_section
+from components.wine_session import ApplyError, wineserver_running
+
+COLORS_KEY = 'Control Panel\\Colors'
+
+_EPOCH_DIFFERENCE = 11644473600
+_SECTION_RE = re.compile(r'^\[(?P<key>(?:[^\]\\]|\\.)*)\](?P<rest>.*)$')
+_VALUE_RE = re.compile(r'^"(?P<name>(?:[^"\\]|\\.)*)"=(?P<data>.*)$')
+_ESCAPE_RE = re.compile(r'\\(x[0-9a-fA-F]{1,4}|[0-7]{1,3}|.)')
+_ESCAPES = {'a': '\a', 'b': '\b', 'e': '\x1b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v'}
+
+
+class PrefixBusyError(ApplyError):
+    pass
+
+
+def user_reg_path(prefix):
+    return os.path.join(prefix, 'user.reg')
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _unescape_match(match):
+    escape = match.group(1)
+    if escape[0] == 'x' and len(escape) > 1:
+        return chr(int(escape[1:], 16))
+    if escape[0] in '01234567':
+        return chr(int(escape, 8))
+    return _ESCAPES.get(escape, escape)
+
+
+def _unescape(text):
+    return _ESCAPE_RE.sub(_unescape_match, text)
+
+
+def _find_colors_block(lines):
+    target = _escape(COLORS_KEY).lower()
+    start = None
+    for i, line in enumerate(lines):
+        match = _SECTION_RE.match(line)
+        if start is None:
+            if match and match.group('key').lower() == target:
+                start = i
+        elif match:
+            end = i
+            while end > start + 1 and not lines[end - 1].strip():
+                end -= 1
+            return start, end
+    if start is None:
+        return None
+    end = len(lines)
+    while end > start + 1 and not lines[end - 1].strip():
+        end -= 1
+    return start, end
+
+
+def _read_lines(path):
+    with open(path, 'r', encoding='utf-8', errors='surrogateescape', newline='') as f:
+        return f.read().split('\n')
+
+
+def _block_entries(lines, block):
+    entries = []
+    continued = False
+    for line in lines[block[0] + 1:block[1]]:
+        if continued:
+            entries[-1][1].append(line)
+        else:
+            match = _VALUE_RE.match(line.rstrip('\r'))
+            entries.append((_unescape(match.group('name')) if match else None, [line]))
+        continued = line.rstrip('\r').endswith('\\')
+    return entries
+
+
+def _block_colors(lines, block):
+    colors = {}
+    if block is None:
+        return colors
+    for name, entry_lines in _block_entries(lines, block):
+        if name is None or len(entry_lines) > 1:
+            continue
+        data = _VALUE_RE.match(entry_lines[0].rstrip('\r')).group('data')
+        if len(data) > 1 and data.startswith('"') and data.endswith('"'):
+            colors[name] = _unescape(data[1:-1])
+    return colors
+
+
+def read_colors(prefix):
+    path = user_reg_path(prefix)
+    if not os.path.isfile(path):
+        return {}
+    lines = _read_lines(path)
+    return _block_colors(lines, _find_colors_block(lines))
+
+
+def changes_from_reg_file(path):
+    changes = {}
+    clear = False
+    for record in parse_reg_file(path):
+        if not is_colors_section(record.section):
+            continue
+        if record.kind == 'delete_section':
+            changes = {}
+            clear = True
+        elif record.kind == 'delete':
+            changes[record.key] = None
+        elif record.kind == 'string':
+            changes[record.key] = record.value
+    return changes, clear
+
+
+def _time_line(now):
+    filetime = int((now + _EPOCH_DIFFERENCE) * 10_000_000)
+    return f'#time={filetime:x}'
+
+
+def _value_line(name, value):
+    return f'"{_escape(name)}"="{_escape(value)}"'
+
+
+def _block_lines(lines, block, changes, clear, now):
+    if block is None:
+        header = f'[{_escape(COLORS_KEY)}] {int(now)}'
+        entries = []
+    else:
+        header = f"[{_SECTION_RE.match(lines[block[0]]).group('key')}] {int(now)}"
+        entries = _block_entries(lines, block)
+
+    pending = {name.lower(): (name, value) for name, value in changes.items()}
+    body = []
+    has_time = False
+    for name, entry_lines in entries:
+        if name is None:
+            if entry_lines[0].startswith('#time='):
+                body.append(_time_line(now))
+                has_time = True
+            elif not clear:
+                body.extend(entry_lines)
+            continue
+
+        change = pending.pop(name.lower(), None)
+        if change is not None:
+            if change[1] is not None:
+                raw_name = _VALUE_RE.match(entry_lines[0].rstrip('\r')).group('name')
+                body.append(f'"{raw_name}"="{_escape(change[1])}"')
+        elif not clear:
+            body.extend(entry_lines)
+
+    if not has_time:
+        body.insert(0, _time_line(now))
+    body += [_value_line(name, value) for name, value in pending.values() if value is not None]
+    return [header] + body
+
+
+def ensure_idle(prefix):
+    if wineserver_running(prefix):
+        raise PrefixBusyError(
+            f"wineserver is running for {prefix}; close Wine applications or run 'wineserver -k' first"
+        )
+
+
+def write_colors(prefix, changes, clear=False):
+    ensure_idle(prefix)
+
+    path = user_reg_path(prefix)
+    if not os.path.isfile(path):
+        raise ApplyError(f"No user.reg found in Wine prefix: {prefix}")
+
+    lines = _read_lines(path)
+    block = _find_colors_block(lines)
+
+    new_block = _block_lines(lines, block, changes, clear, time.time())
+    if block is None:
+        while lines and not lines[-1].strip():
+            lines.pop()
+        lines += [''] + new_block + ['']
+    else:
+        lines[block[0]:block[1]] = new_block
+
+    fd, temp_path = tempfile.mkstemp(prefix='.user.reg.', dir=prefix)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', errors='surrogateescape', newline='') as f:
+            f.write('\n'.join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return _block_colors(lines, _find_colors_block(lines))
+
+
+def apply_reg_file(path, prefix):
+    start = time.perf_counter()
+    changes, clear = changes_from_reg_file(path)
+    write_colors(prefix, changes, clear)
+    return (time.perf_counter() - start) * 1000
@@ -0,0 +1,126 @@
+import sys
+from customtkinter import CTkFrame, CTkLabel, CTkScrollbar, CTkFont
+from components.incremental_builder import IncrementalBuilder
+
+
+class VirtualList(CTkFrame):
+    def __init__(self, master, create_row, bind_row, row_height=42, **kwargs):
+        super().__init__(master, **kwargs)
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.row_height = row_height
+
+        self.items = []
+        self.first = 0
+        self.rows = []
+        self._shown_rows = 0
+        self._wanted_rows = 0
+        self.builder = IncrementalBuilder(self)
+
+        self.body = CTkFrame(self, fg_color="transparent")
+        self.body.pack(side="left", fill="both", expand=True)
+        self.body.pack_propagate(False)
+
+        self.scrollbar = CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.message_label = CTkLabel(self.body, text="", font=CTkFont(size=14))
+
+        self.body.bind('<Configure>', lambda e: self.render())
+        self.bind_wheel(self.body)
+
+    def bind_wheel(self, widget):
+        widget.bind('<MouseWheel>', self._on_mouse_wheel)
+        widget.bind('<Button-4>', lambda e: self.scroll_rows(-1))
+        widget.bind('<Button-5>', lambda e: self.scroll_rows(1))
+
+    def _on_mouse_wheel(self, event):
+        if sys.platform == "darwin":
+            step = -event.delta
+        else:
+            step = -int(event.delta / 120) or (-1 if event.delta > 0 else 1)
+        self.scroll_rows(step)
+
+    def _on_scrollbar(self, action, value, units=None):
+        if action == 'moveto':
+            self.first = int(round(float(value) * len(self.items)))
+        elif action == 'scroll':
+            step = int(float(value))
+            if units == 'pages':
+                step *= self.full_count()
+            self.first += step
+        self.render()
+
+    def scroll_rows(self, step):
+        self.first += step
+        self.render()
+
+    def set_items(self, items, keep_position=True):
+        self.items = items
+        if not keep_position:
+            self.first = 0
+        self.render()
+
+    def _row_height(self):
+        if self.rows and self.rows[0]['frame'].winfo_ismapped():
+            return max(1, self.rows[0]['frame'].winfo_height() + 4)
+        return max(1, self.row_height)
+
+    def visible_count(self):
+        return max(1, -(-self.body.winfo_height() // self._row_height()))
+
+    def full_count(self):
+        return max(1, self.body.winfo_height() // self._row_height())
+
+    def _ensure_rows(self, count):
+        self._wanted_rows = max(self._wanted_rows, count)
+        if len(self.rows) < count and not self.builder.running:
+            self.builder.start(self._missing_rows(), self._add_row, on_slice=self.render)
+
+    def _missing_rows(self):
+        while len(self.rows) < self._wanted_rows:
+            yield len(self.rows)
+
+    def _add_row(self, index):
+        row = self.create_row(self.body)
+        for widget in row.get('widgets', [row['frame']]):
+            self.bind_wheel(widget)
+        self.rows.append(row)
+
+    def refresh_items(self, items):
+        items = set(items)
+        for row in self.rows[:self._shown_rows]:
+            if row.get('item') in items:
+                self.bind_row(row, row['item'])
+
+    def show_message(self, text):
+        self.message_label.configure(text=text)
+        self.message_label.pack(pady=20)
+
+    def hide_message(self):
+        self.message_label.pack_forget()
+
+    def render(self):
+        count = min(self.visible_count(), len(self.items))
+        full = min(self.full_count(), len(self.items))
+        self.first = max(0, min(self.first, len(self.items) - full))
+        self._ensure_rows(count)
+        count = min(count, len(self.items) - self.first, len(self.rows))
+
+        for i in range(count):
+            row = self.rows[i]
+            item = self.items[self.first + i]
+            if row.get('item') != item:
+                row['item'] = item
+                self.bind_row(row, item)
+            if i >= self._shown_rows:
+                row['frame'].pack(fill="x", padx=5, pady=2)
+
+        for row in self.rows[count:self._shown_rows]:
+            row['frame'].pack_forget()
+        self._shown_rows = count
+
+        if self.items:
+            self.scrollbar.set(self.first / len(self.items), (self.first + full) / len(self.items))
+        else:
+            self.scrollbar.set(0.0, 1.0)
@@ -0,0 +1,259 @@
+import os
+import re
+import time
+import threading
+import subprocess
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SERVER_ALREADY_RUNNING = 2
+SERVER_TIMEOUT = 30
+
+_REG_QUERY_RE = re.compile(r'^\s+(?P<name>.*?)\s{4}(?P<type>REG_\w+)(?:\s{4}(?P<data>.*))?$')
+
+
+class ApplyError(RuntimeError):
+    pass
+
+
+class ApplyCancelled(ApplyError):
+    pass
+
+
+def default_prefix():
+    return os.environ.get('WINEPREFIX') or os.path.expanduser('~/.wine')
+
+
+def prefix_key(prefix):
+    return os.path.realpath(os.path.expanduser(prefix or default_prefix()))
+
+
+def server_lock_path(prefix):
+    stat = os.stat(prefix)
+    return os.path.join(f'/tmp/.wine-{os.getuid()}', f'server-{stat.st_dev:x}-{stat.st_ino:x}', 'lock')
+
+
+def wineserver_running(prefix):
+    if fcntl is None:
+        return False
+    try:
+        fd = os.open(server_lock_path(prefix), os.O_RDWR)
+    except OSError:
+        return False
+
+    try:
+        fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return True
+    else:
+        fcntl.lockf(fd, fcntl.LOCK_UN)
+        return False
+    finally:
+        os.close(fd)
+
+
+class WineSession:
+    def __init__(self, prefix=None, wine='wine', wineserver='wineserver'):
+        self.prefix = prefix
+        self.wine = wine
+        self.wineserver = wineserver
+        self.owns_server = False
+        self.foreign_server = False
+        self._server = None
+        self._lock = threading.Lock()
+
+    def env(self):
+        env = os.environ.copy()
+        if self.prefix:
+            env['WINEPREFIX'] = self.prefix
+        return env
+
+    def resolved_prefix(self):
+        return self.prefix or default_prefix()
+
+    def is_running(self):
+        return self._server is not None and self._server.poll() is None
+
+    def start(self):
+        with self._lock:
+            if self.is_running():
+                return True
+
+            if wineserver_running(prefix_key(self.prefix)):
+                self.foreign_server = True
+                return True
+            self.foreign_server = False
+
+            self._server = subprocess.Popen(
+                [self.wineserver, '-f', f'-p{SERVER_TIMEOUT}'],
+                env=self.env(),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+            try:
+                code = self._server.wait(timeout=0.2)
+            except subprocess.TimeoutExpired:
+                self.owns_server = True
+                return True
+
+            self._server = None
+            self.owns_server = False
+            self.foreign_server = code == SERVER_ALREADY_RUNNING
+            return self.foreign_server
+
+    def _run(self, args, timeout=None, cancel=None):
+        try:
+            self.start()
+        except FileNotFoundError:
+            pass
+
+        process = subprocess.Popen(
+            args,
+            env=self.env(),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors='replace',
+        )
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = 0.1 if cancel is not None else timeout
+            if deadline is not None:
+                wait = max(0, min(wait, deadline - time.monotonic()))
+            try:
+                stdout, stderr = process.communicate(timeout=wait)
+                break
+            except subprocess.TimeoutExpired:
+                if cancel is not None and cancel.is_set():
+                    process.kill()
+                    process.communicate()
+                    raise ApplyCancelled("Cancelled")
+                if deadline is not None and time.monotonic() >= deadline:
+                    process.kill()
+                    process.communicate()
+                    raise
+        return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+    def run_regedit(self, path, timeout=None, cancel=None):
+        start = time.perf_counter()
+        result = self._run([self.wine, 'regedit', path], timeout, cancel)
+        return result, (time.perf_counter() - start) * 1000
+
+    def query_key(self, key, timeout=30, cancel=None):
+        result = self._run([self.wine, 'reg', 'query', key], timeout, cancel)
+        if result.returncode != 0:
+            return None
+
+        values = {}
+        for line in result.stdout.splitlines():
+            match = _REG_QUERY_RE.match(line.rstrip('\r'))
+            if match and match.group('type') == 'REG_SZ':
+                values[match.group('name')] = match.group('data') or ''
+        return values
+
+    def _other_clients(self):
+        prefix = os.path.realpath(self.resolved_prefix())
+        server_pid = self._server.pid if self._server else None
+        clients = []
+
+        for pid in os.listdir('/proc') if os.path.isdir('/proc') else []:
+            if not pid.isdigit() or int(pid) in (os.getpid(), server_pid):
+                continue
+            try:
+                with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                    argv0 = f.read().split(b'\0', 1)[0].decode(errors='replace')
+                with open(f'/proc/{pid}/environ', 'rb') as f:
+                    environ = dict(
+                        item.split(b'=', 1) for item in f.read().split(b'\0') if b'=' in item
+                    )
+            except OSError:
+                continue
+
+            name = os.path.basename(argv0).lower()
+            if 'wineserver' in name or not (name.endswith('.exe') or 'wine' in name):
+                continue
+
+            client_prefix = environ.get(b'WINEPREFIX')
+            client_prefix = os.fsdecode(client_prefix) if client_prefix else default_prefix()
+            if os.path.realpath(client_prefix) == prefix:
+                clients.append(int(pid))
+
+        return clients
+
+    def shutdown(self):
+        with self._lock:
+            if not self.is_running() or not self.owns_server:
+                return False
+
+            if self._other_clients():
+                return False
+
+            self._server.terminate()
+            try:
+                self._server.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._server.kill()
+            self._server = None
+            self.owns_server = False
+            return True
+
+
+_sessions = {}
+_released = []
+_sessions_lock = threading.Lock()
+
+
+def get_session(prefix=None):
+    key = prefix_key(prefix)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = WineSession(key if prefix else None)
+        return session
+
+
+def release_session(prefix=None):
+    with _sessions_lock:
+        session = _sessions.pop(prefix_key(prefix), None)
+        _released[:] = [released for released in _released if released.is_running()]
+        if session is not None and session.is_running():
+            _released.append(session)
+        return session
+
+
+def shutdown_all():
+    with _sessions_lock:
+        sessions = list(_sessions.values()) + _released
+        _released.clear()
+    for session in sessions:
+        session.shutdown()
+
+
+def discover_prefixes():
+    home = os.path.expanduser('~')
+    candidates = [default_prefix()]
+    candidates += [p for p in os.environ.get('VINEYARD_PREFIXES', '').split(os.pathsep) if p]
+
+    for parent in (home, os.path.join(home, '.local', 'share', 'wineprefixes'), os.path.join(home, 'Games')):
+        try:
+            with os.scandir(parent) as entries:
+                for entry in entries:
+                    if parent != home or entry.name.startswith('.wine'):
+                        candidates.append(entry.path)
+        except OSError:
+            continue
+
+    prefixes = []
+    seen = set()
+    for candidate in candidates:
+        path = os.path.realpath(os.path.expanduser(candidate))
+        if path not in seen and os.path.isfile(os.path.join(path, 'system.reg')):
+            seen.add(path)
+            prefixes.append(path)
+    return prefixes
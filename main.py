@@ -1,9 +1,10 @@
+import time
+_startup = time.perf_counter()
+
+import threading
 from customtkinter import *
 from components.header import Header
-from components.header_utilities import *
-from components.theme_list import ThemeList
 from components.console import Console
-from theme_maker import ThemeMaker
 
 set_appearance_mode("dark")
 set_default_color_theme("blue")
@@ -44,40 +45,134 @@ console_frame = CTkFrame(main_content)
 console_frame.grid(row=1, column=0, sticky="nsew", pady=(5, 0))
 
 console = Console(console_frame)
-theme_list = ThemeList(theme_list_frame, console)
+loading_label = CTkLabel(theme_list_frame, text="Loading themes...")
+loading_label.pack(expand=True)
+
+log_sink = None
+theme_list = None
+pending_query = ""
 
-theme_maker = ThemeMaker()
+theme_maker = None
+prefix_selector = None
+
+def get_theme_maker():
+    global theme_maker
+    if theme_maker is None:
+        from theme_maker import ThemeMaker
+        theme_maker = ThemeMaker()
+    return theme_maker
 
 def on_theme_maker_close():
     update_theme_maker_button_state()
 
 def open_theme_maker():
-    theme_maker.set_on_close_callback(on_theme_maker_close)
-    theme_maker.open()
+    maker = get_theme_maker()
+    maker.set_on_close_callback(on_theme_maker_close)
+    maker.open()
     update_theme_maker_button_state()
 
 def update_theme_maker_button_state():
-    if theme_maker.is_open():
+    if theme_maker is not None and theme_maker.is_open():
         theme_maker_button.configure(state="disabled")
     else:
         theme_maker_button.configure(state="normal")
 
-def check_theme_maker_status():
-    if theme_maker.is_open():
-        root.after(1000, check_theme_maker_status)
-    else:
-        update_theme_maker_button_state()
+def with_theme_list(name):
+    def command():
+        if theme_list is not None:
+            getattr(theme_list, name)()
+    return command
 
-header_init.add_button("Revert", command=lambda: run_revert_command(console, root))
-header_init.add_button("Open Themes Path", command=lambda: open_themes_path(console))
-header_init.add_button("Refresh", command=lambda: theme_list.refresh_themes())
+def filter_themes(query):
+    global pending_query
+    if theme_list is None:
+        pending_query = query
+    else:
+        theme_list.filter_themes(query)
+
+def revert():
+    if theme_list is None:
+        return
+    from components.header_utilities import run_revert_command
+    run_revert_command(console, theme_list.apply_backend, theme_list.target_prefixes)
+
+def open_prefixes():
+    global prefix_selector
+    if theme_list is None:
+        return
+    if prefix_selector is None:
+        from components.prefix_selector import PrefixSelector
+        prefix_selector = PrefixSelector(console, theme_list.set_target_prefixes)
+    prefix_selector.open()
+
+def open_themes_folder():
+    from components.header_utilities import open_themes_path
+    open_themes_path(console)
+
+header_init.add_button("Revert", command=revert)
+header_init.add_button("Undo", command=with_theme_list('undo_last_apply'))
+header_init.add_button("Prefixes", command=open_prefixes)
+header_init.add_button("Cancel Apply", command=with_theme_list('cancel_applies'))
+header_init.add_button("Validate All", command=with_theme_list('validate_all'))
+header_init.add_button("Stop Validation", command=with_theme_list('cancel_validation'))
+header_init.add_button("Open Themes Path", command=open_themes_folder)
+header_init.add_button("Refresh", command=with_theme_list('refresh_themes'))
 theme_maker_button = header_init.add_button("Theme Maker", command=open_theme_maker)
-header_init.add_search(theme_list.filter_themes)
+header_init.add_search(filter_themes)
 
 update_theme_maker_button_state()
 
-console.system("Vineyard Theme Manager started successfully")
-
-root.after(1000, check_theme_maker_status)
-
-root.mainloop()
\ No newline at end of file
+def start_wine_session():
+    from components.wine_session import get_session, release_session
+    try:
+        if get_session().start():
+            console.debug("Persistent wineserver session ready")
+    except FileNotFoundError:
+        pass
+    release_session()
+
+_themes_started = False
+
+def load_theme_list():
+    global _themes_started, log_sink, theme_list
+    if _themes_started:
+        return
+    _themes_started = True
+    painted = (time.perf_counter() - _startup) * 1000
+
+    from components.log_sink import LogSink
+    from components.theme_list import ThemeList
+    from components.apply_backend import DEFAULT_BACKEND, REGEDIT
+
+    log_sink = LogSink()
+    console.log_sink = log_sink
+    console.system("Vineyard Theme Manager started successfully")
+
+    loading_label.destroy()
+    theme_list = ThemeList(theme_list_frame, console)
+    theme_list.set_header(header_init)
+    if pending_query:
+        theme_list.filter_themes(pending_query)
+    loaded = (time.perf_counter() - _startup) * 1000
+    console.debug(f"Startup: window shown after {painted:.0f} ms", "first-paint", painted)
+    console.debug(f"Startup: themes listed after {loaded:.0f} ms", "themes-loaded", loaded)
+
+    if DEFAULT_BACKEND == REGEDIT:
+        threading.Thread(target=start_wine_session, daemon=True).start()
+
+def on_first_map(event):
+    if event.widget is root:
+        root.unbind('<Map>', first_map_binding)
+        root.after_idle(lambda: root.after(0, load_theme_list))
+
+first_map_binding = root.bind('<Map>', on_first_map, add='+')
+root.after(500, load_theme_list)
+
+root.mainloop()
+
+if theme_list is not None:
+    from components.wine_session import shutdown_all
+    theme_list.stop_watching()
+    shutdown_all()
+if log_sink is not None:
+    log_sink.close()
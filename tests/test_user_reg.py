@@ -0,0 +1,120 @@
+import sys
+import json
+import subprocess
+
+import pytest
+
+from components import user_reg, wine_session
+from components.apply_backend import USER_REG, apply_colors, revert_colors, undo_last_apply
+from components.undo_stack import UndoStack
+
+USER_REG_TEXT = (
+    'WINE REGISTRY Version 2\n'
+    ';; All keys relative to \\\\User\n'
+    '\n'
+    '#arch=win64\n'
+    '\n'
+    '[Control Panel\\\\Colors] 1700000000\n'
+    '#time=1d9ffffffffffff\n'
+    '"Menu"="5 5 5"\n'
+    '"Odd"=dword:00000010\n'
+    '"Window"="1 1 1"\n'
+    '\n'
+    '[Software\\\\Wine] 1700000000\n'
+    '#time=1d9ffffffffffff\n'
+    '"Version"="win10"\n'
+)
+
+HOLD_LOCK = (
+    "import os, sys, fcntl\n"
+    "fd = os.open(sys.argv[1], os.O_RDWR | os.O_CREAT)\n"
+    "fcntl.lockf(fd, fcntl.LOCK_EX)\n"
+    "print('locked', flush=True)\n"
+    "sys.stdin.read()\n"
+)
+
+
+@pytest.fixture
+def prefix(tmp_path, monkeypatch):
+    path = tmp_path / 'prefix'
+    path.mkdir()
+    (path / 'user.reg').write_text(USER_REG_TEXT, encoding='utf-8')
+    monkeypatch.setattr(wine_session, 'server_lock_path', lambda prefix: str(tmp_path / 'lock'))
+    return str(path)
+
+
+@pytest.fixture
+def keys_path(tmp_path):
+    path = tmp_path / 'keys.json'
+    path.write_text(json.dumps({'Menu': None, 'Window': None}), encoding='utf-8')
+    return str(path)
+
+
+def read_user_reg(prefix):
+    with open(user_reg.user_reg_path(prefix), encoding='utf-8') as f:
+        return f.read()
+
+
+def test_write_preserves_other_keys(prefix):
+    user_reg.write_colors(prefix, {'Window': '2 2 2', 'Menu': None, 'Hilight': '3 3 3'})
+
+    content = read_user_reg(prefix)
+    assert '"Window"="2 2 2"' in content
+    assert '"Hilight"="3 3 3"' in content
+    assert '"Menu"' not in content
+    assert '"Odd"=dword:00000010' in content
+    assert '[Software\\\\Wine] 1700000000\n#time=1d9ffffffffffff\n"Version"="win10"' in content
+    assert content.startswith('WINE REGISTRY Version 2\n;; All keys relative to \\\\User\n\n#arch=win64\n')
+
+
+def test_write_updates_time(prefix):
+    user_reg.write_colors(prefix, {'Window': '2 2 2'})
+
+    content = read_user_reg(prefix)
+    header = next(line for line in content.splitlines() if line.startswith('[Control Panel\\\\Colors]'))
+    assert header != '[Control Panel\\\\Colors] 1700000000'
+    assert content.count('#time=1d9ffffffffffff') == 1
+
+
+def test_write_refuses_while_wineserver_holds_prefix(prefix, tmp_path):
+    holder = subprocess.Popen(
+        [sys.executable, '-c', HOLD_LOCK, str(tmp_path / 'lock')],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == 'locked'
+        with pytest.raises(user_reg.PrefixBusyError):
+            user_reg.write_colors(prefix, {'Window': '2 2 2'})
+    finally:
+        holder.stdin.close()
+        holder.wait()
+
+    assert read_user_reg(prefix) == USER_REG_TEXT
+    user_reg.write_colors(prefix, {'Window': '2 2 2'})
+    assert user_reg.read_colors(prefix)['Window'] == '2 2 2'
+
+
+def test_revert_and_undo_round_trip(prefix, keys_path, tmp_path):
+    undo_stack = UndoStack(str(tmp_path / 'undo.json'))
+
+    changed, _ = apply_colors({'Window': '9 9 9', 'Menu': '8 8 8'}, USER_REG, prefix, undo_stack=undo_stack, label='Test')
+    assert changed == {'Window': '9 9 9', 'Menu': '8 8 8'}
+    changed, _ = apply_colors({'Window': '9 9 9', 'Menu': '8 8 8'}, USER_REG, prefix, undo_stack=undo_stack, label='Test')
+    assert changed == {}
+
+    revert_colors(USER_REG, prefix, undo_stack=undo_stack, keys_path=keys_path)
+    colors = user_reg.read_colors(prefix)
+    assert 'Window' not in colors
+    assert 'Menu' not in colors
+
+    label, _, _ = undo_last_apply(undo_stack, USER_REG, prefix, keys_path=keys_path)
+    assert label == 'revert'
+    assert user_reg.read_colors(prefix)['Window'] == '9 9 9'
+
+    label, _, _ = undo_last_apply(undo_stack, USER_REG, prefix, keys_path=keys_path)
+    assert label == 'Test'
+    colors = user_reg.read_colors(prefix)
+    assert colors['Window'] == '1 1 1'
+    assert colors['Menu'] == '5 5 5'
+    assert '"Odd"=dword:00000010' in read_user_reg(prefix)
+    assert undo_last_apply(undo_stack, USER_REG, prefix, keys_path=keys_path) is None
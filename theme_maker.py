@@ -1,10 +1,13 @@
 from customtkinter import CTkToplevel, CTkFrame, CTkButton, CTkLabel, CTkEntry, CTkScrollableFrame, CTkTabview
 import tkinter as tk
 from tkinter import colorchooser, filedialog, messagebox
-import json
 import os
 from datetime import datetime
 from components.context_menu import ContextMenu
+from components.reg_parser import parse_reg_text, colors_from_records, rgb_to_hex
+from components.key_schema import get_schema
+from components.theme_index import get_index
+from components.incremental_builder import IncrementalBuilder
 
 class ThemeMaker:
     _instance = None
@@ -18,6 +21,13 @@ class ThemeMaker:
     _current_edit_file = None
     _save_button = None
     _save_as_button = None
+    _basic_builder = None
+    _basic_signature = None
+    _pending_file = None
+    _tabview = None
+    _basic_tab = None
+    _advanced_tab = None
+    _initial_reg_content = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -119,9 +129,6 @@ class ThemeMaker:
         self._reg_text_widget.delete('1.0', tk.END)
         self._reg_text_widget.insert('1.0', formatted_content)
 
-        self._reg_text_widget.highlighter.highlight()
-        self._reg_text_widget.line_numbers.update_line_numbers()
-
     def _reset_advanced_tab(self):
         if not hasattr(self, '_initial_reg_content') or not self._initial_reg_content:
             return
@@ -130,25 +137,9 @@ class ThemeMaker:
                               "Reset Advanced tab to initial state?\n\nThis will discard all changes made in the Advanced tab."):
             self._reg_text_widget.delete('1.0', tk.END)
             self._reg_text_widget.insert('1.0', self._initial_reg_content)
-            self._reg_text_widget.highlighter.highlight()
 
     def _parse_reg_values(self, content):
-        values = {}
-        lines = content.split('\n')
-
-        for line in lines:
-            line = line.strip()
-            if line and '=' in line and not line.startswith(';') and not line.startswith('['):
-                try:
-                    key_part, value_part = line.split('=', 1)
-                    key = key_part.strip().strip('"')
-                    value = value_part.strip().strip('"')
-                    if key:
-                        values[key] = value
-                except:
-                    continue
-                
-        return values
+        return colors_from_records(parse_reg_text(content), include_unsectioned=True)
 
     def set_on_close_callback(self, callback):
         self._on_close_callback = callback
@@ -158,6 +149,9 @@ class ThemeMaker:
             self._is_edit_mode = False
             self._current_edit_file = None
             self.create_window()
+        elif not self.is_open():
+            self.reset()
+            self._show_window()
         else:
             self._window.lift()
             self._window.focus_force()
@@ -172,12 +166,37 @@ class ThemeMaker:
             self.load_theme_from_file(file_path)
             self._window.title(f"Vineyard - Theme Maker - Editing: {display_name}")
         else:
+            if not self.is_open():
+                self.reset()
             self._is_edit_mode = True
             self._current_edit_file = file_path
             self.load_theme_from_file(file_path)
             self._window.title(f"Vineyard - Theme Maker - Editing: {display_name}")
             self.update_save_buttons()
+            self._show_window()
+
+        self._window.lift()
+        self._window.focus_force()
+
+    def reset(self):
+        self._is_edit_mode = False
+        self._current_edit_file = None
+        self._pending_file = None
+        self._window.title("Vineyard - Theme Maker")
+        self._tabview.set("Basic")
+
+        if get_schema().signature != self._basic_signature:
+            self.create_basic_tab(self._basic_tab)
+        else:
+            for key, value in self._default_colors().items():
+                self._set_color(key, value)
+            self._original_colors = self._default_colors()
+            self._initial_reg_content = self.generate_registry_file()
+            self.update_reg_code_from_basic()
+        self.update_save_buttons()
 
+    def _show_window(self):
+        self._window.deiconify()
         self._window.lift()
         self._window.focus_force()
 
@@ -202,19 +221,20 @@ class ThemeMaker:
         main_container.grid_rowconfigure(1, weight=0)
         main_container.grid_columnconfigure(0, weight=1)
 
-        tabview = CTkTabview(main_container)
-        tabview.grid(row=0, column=0, sticky="nsew", pady=(0, 10))
+        self._tabview = CTkTabview(main_container, command=self._on_tab_change)
+        self._tabview.grid(row=0, column=0, sticky="nsew", pady=(0, 10))
         
-        basic_tab = tabview.add("Basic")
-        advanced_tab = tabview.add("Advanced")
+        self._basic_tab = self._tabview.add("Basic")
+        self._advanced_tab = self._tabview.add("Advanced")
         
-        basic_tab.grid_columnconfigure(0, weight=1)
-        basic_tab.grid_rowconfigure(0, weight=1)
-        advanced_tab.grid_columnconfigure(0, weight=1)
-        advanced_tab.grid_rowconfigure(0, weight=1)
+        self._basic_tab.grid_columnconfigure(0, weight=1)
+        self._basic_tab.grid_rowconfigure(0, weight=1)
+        self._advanced_tab.grid_columnconfigure(0, weight=1)
+        self._advanced_tab.grid_rowconfigure(0, weight=1)
         
-        self.create_basic_tab(basic_tab)
-        self.create_advanced_tab(advanced_tab)
+        self._reg_text_widget = None
+        self._initial_reg_content = None
+        self.create_basic_tab(self._basic_tab)
 
         button_frame = CTkFrame(main_container)
         button_frame.grid(row=1, column=0, sticky="ew", pady=0)
@@ -250,35 +270,44 @@ class ThemeMaker:
         scrollable_frame.pack(fill="both", expand=True, padx=0, pady=0)
         scrollable_frame.grid_columnconfigure(0, weight=1)
 
-        try:
-            with open('keys.json', 'r', encoding='utf-8') as f:
-                keys = json.load(f)
-        except FileNotFoundError:
-            keys = {}
+        self._basic_signature = get_schema().signature
+        keys = self._default_colors()
 
         self._preview_labels = {}
         self._color_entries = {}
+        self._original_colors = {}
 
-        keys_items = list(keys.items())
-        batch_size = 20
+        def build_row(item):
+            i, (key, value) = item
+            self._original_colors[key] = value
+            self._create_color_row(scrollable_frame, key, value, i)
 
-        def process_batch(start_index):
-            end_index = min(start_index + batch_size, len(keys_items))
+        if self._basic_builder is not None:
+            self._basic_builder.cancel()
+        self._basic_builder = IncrementalBuilder(scrollable_frame)
+        self._basic_builder.start(enumerate(keys.items()), build_row, on_done=self._on_basic_built)
 
-            for i in range(start_index, end_index):
-                key, value = keys_items[i]
-                if value is None:
-                    value = "#000000"
+    def _on_basic_built(self):
+        if self._pending_file is not None:
+            file_path, self._pending_file = self._pending_file, None
+            self.load_theme_from_file(file_path)
+            return
+        self._initial_reg_content = self.generate_registry_file()
+        self.update_reg_code_from_basic()
 
-                self._original_colors[key] = value
-                self._create_color_row(scrollable_frame, key, value, i)
+    def _default_colors(self):
+        return {key: value or "#000000" for key, value in get_schema().default_colors().items()}
 
-            if end_index < len(keys_items):
-                self._window.after(10, process_batch, end_index)
-            else:
-                self.update_reg_code_from_basic()
+    def _set_color(self, key, hex_color):
+        if key in self._color_entries:
+            self._color_entries[key].delete(0, tk.END)
+            self._color_entries[key].insert(0, hex_color)
+            if key in self._preview_labels:
+                self._preview_labels[key].configure(fg_color=hex_color)
 
-        process_batch(0)
+    def _on_tab_change(self):
+        if self._tabview.get() == "Advanced" and self._reg_text_widget is None:
+            self.create_advanced_tab(self._advanced_tab)
 
     def create_advanced_tab(self, parent):
         from components.reg_highlight import RegTextWidget
@@ -307,7 +336,8 @@ class ThemeMaker:
         apply_btn.grid(row=0, column=2, padx=(0, 0), pady=5)
 
         self.update_reg_code_from_basic()
-        self._initial_reg_content = self._reg_text_widget.get('1.0', tk.END)
+        if self._initial_reg_content is None:
+            self._initial_reg_content = self._reg_text_widget.get('1.0', tk.END)
 
         self._create_context_menu()
 
@@ -316,6 +346,7 @@ class ThemeMaker:
             reg_content = self.generate_registry_file()
             self._reg_text_widget.delete('1.0', tk.END)
             self._reg_text_widget.insert('1.0', reg_content)
+            self._reg_text_widget.flush_repaint()
 
     def update_basic_from_reg_code(self):
         if not self._reg_text_widget:
@@ -339,36 +370,20 @@ class ThemeMaker:
 
         try:
             reg_content = self._reg_text_widget.get('1.0', tk.END)
-            lines = reg_content.split('\n')
+            colors = self._parse_reg_values(reg_content)
 
             updated_count = 0
-            for line in lines:
-                line = line.strip()
-                if line and not line.startswith(';') and not line.startswith('[') and not line.startswith('Windows'):
-                    if '=' in line:
-                        key_part, value_part = line.split('=', 1)
-                        key = key_part.strip().strip('"')
-                        value = value_part.strip().strip('"')
-
-                        if key in self._color_entries and ' ' in value:
-                            rgb_values = value.split()
-                            if len(rgb_values) == 3:
-                                try:
-                                    r, g, b = map(int, rgb_values)
-                                    if not all(0 <= val <= 255 for val in [r, g, b]):
-                                        continue
-
-                                    hex_color = f"#{r:02x}{g:02x}{b:02x}".upper()
-                                    self._color_entries[key].delete(0, tk.END)
-                                    self._color_entries[key].insert(0, hex_color)
-
-                                    if hasattr(self, '_preview_labels') and key in self._preview_labels:
-                                        self._preview_labels[key].configure(fg_color=hex_color)
-
-                                    updated_count += 1
-                                except ValueError:
-                                    continue
-                                
+            for key, value in colors.items():
+                hex_color = rgb_to_hex(value)
+                if key in self._color_entries and hex_color:
+                    self._color_entries[key].delete(0, tk.END)
+                    self._color_entries[key].insert(0, hex_color)
+
+                    if hasattr(self, '_preview_labels') and key in self._preview_labels:
+                        self._preview_labels[key].configure(fg_color=hex_color)
+
+                    updated_count += 1
+
             self.update_reg_code_from_basic()
 
             return True
@@ -411,11 +426,7 @@ class ThemeMaker:
         return f"{r} {g} {b}"
 
     def rgb_to_hex(self, rgb_string):
-        try:
-            r, g, b = map(int, rgb_string.split())
-            return f"#{r:02x}{g:02x}{b:02x}".upper()
-        except:
-            return "#000000"
+        return rgb_to_hex(rgb_string) or "#000000"
     
     def update_save_buttons(self):
         if self._save_button and self._save_as_button:
@@ -427,42 +438,27 @@ class ThemeMaker:
                 self._save_as_button.grid_remove()
 
     def load_theme_from_file(self, file_path):
+        if self._basic_builder is not None and self._basic_builder.running:
+            self._pending_file = file_path
+            return
+
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                reg_content = f.read()
+            entry = get_index(os.path.dirname(file_path)).get(os.path.basename(file_path))
+            if entry is None:
+                raise FileNotFoundError(f"Theme file not found or unreadable: {file_path}")
 
-            lines = reg_content.split('\n')
             color_values = {}
-
-            for line in lines:
-                line = line.strip()
-                if line and not line.startswith(';') and not line.startswith('[') and not line.startswith('Windows'):
-                    if '=' in line:
-                        key_part, value_part = line.split('=', 1)
-                        key = key_part.strip().strip('"')
-                        value = value_part.strip().strip('"')
-
-                        if ' ' in value:
-                            rgb_values = value.split()
-                            if len(rgb_values) == 3:
-                                try:
-                                    r, g, b = map(int, rgb_values)
-                                    hex_color = f"#{r:02x}{g:02x}{b:02x}".upper()
-                                    color_values[key] = hex_color
-                                except ValueError:
-                                    continue
+            for key, value in entry['colors'].items():
+                hex_color = rgb_to_hex(value) if isinstance(value, str) else None
+                if hex_color:
+                    color_values[key] = hex_color
 
             for key, hex_color in color_values.items():
-                if key in self._color_entries:
-                    self._color_entries[key].delete(0, tk.END)
-                    self._color_entries[key].insert(0, hex_color)
-
-                    if hasattr(self, '_preview_labels') and key in self._preview_labels:
-                        self._preview_labels[key].configure(fg_color=hex_color)
+                self._set_color(key, hex_color)
 
             self.update_reg_code_from_basic()
 
-            self._initial_reg_content = self._reg_text_widget.get('1.0', tk.END)
+            self._initial_reg_content = self.generate_registry_file()
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load theme: {str(e)}")
@@ -566,10 +562,9 @@ class ThemeMaker:
 
     def on_close(self):
         if self._window:
+            self._window.withdraw()
             if self._on_close_callback:
                 self._on_close_callback()
-            self._window.destroy()
-            self._window = None
 
     def _on_destroy(self, event):
         if event.widget == self._window:
@@ -578,4 +573,4 @@ class ThemeMaker:
                 self._on_close_callback()
 
     def is_open(self):
-        return self._window is not None and self._window.winfo_exists()
\ No newline at end of file
+        return self._window is not None and self._window.winfo_exists() and self._window.state() != "withdrawn"
\ No newline at end of file
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import argparse
+
+from components.theme_index import ThemeIndex, list_theme_files
+from components.key_schema import KEYS_PATH
+
+THEMES_PATH = os.path.join(os.getcwd(), 'themes')
+
+
+def open_index(args):
+    index = ThemeIndex(args.themes, args.keys)
+    index.refresh()
+    return index
+
+
+def resolve_theme(index, name):
+    for candidate in index.entries:
+        if candidate.lower() in (name.lower(), name.lower() + '.reg'):
+            return candidate
+    return None
+
+
+def cmd_list(args):
+    index = open_index(args)
+    themes = sorted(list_theme_files(args.themes), key=str.lower)
+
+    if args.json:
+        print(json.dumps([
+            {
+                'name': os.path.splitext(name)[0],
+                'file': name,
+                'colors': len(index.entries[name]['colors']),
+                'valid': not index.entries[name]['unknown_keys'],
+            }
+            for name in themes if name in index.entries
+        ], indent=2))
+        return 0
+
+    for name in themes:
+        entry = index.entries.get(name)
+        if entry is None:
+            continue
+        status = "" if not entry['unknown_keys'] else "  (invalid)"
+        print(f"{os.path.splitext(name)[0]}{status}")
+    return 0
+
+
+def cmd_validate(args):
+    from components.key_schema import get_schema
+    from components.theme_validator import validate_themes
+
+    schema = get_schema(args.keys)
+    if schema.error is not None:
+        print(f"Could not load {args.keys}: {schema.error}", file=sys.stderr)
+        return 2
+
+    names = None
+    if args.themes_to_check:
+        index = open_index(args)
+        names = []
+        for name in args.themes_to_check:
+            resolved = resolve_theme(index, name)
+            if resolved is None:
+                print(f"{name}: not found", file=sys.stderr)
+                return 2
+            names.append(resolved)
+
+    def report(name, digest, problems, cached):
+        display_name = os.path.splitext(name)[0]
+        if args.jsonl:
+            print(json.dumps({'theme': display_name, 'file': name, 'sha1': digest, 'problems': problems, 'cached': cached}), flush=True)
+            return
+        if problems:
+            print(f"FAIL {display_name}")
+            for problem in problems:
+                print(f"  {problem}")
+        else:
+            print(f"ok   {display_name}")
+
+    try:
+        summary = validate_themes(args.themes, args.keys, names, args.jobs, not args.no_cache, report,
+                                  save=not args.no_save)
+    except KeyboardInterrupt:
+        return 130
+
+    if args.jsonl:
+        print(json.dumps({'summary': summary}), flush=True)
+    else:
+        valid = summary['total'] - summary['failed']
+        print(f"{valid} of {summary['total']} themes valid "
+              f"({summary['checked']} checked, {summary['cached']} cached, {summary['ms']:.0f} ms)")
+    return 1 if summary['failed'] else 0
+
+
+def run_jobs(prefixes, label, run, describe):
+    import threading
+    from components.apply_queue import get_queue, DONE
+
+    prefixes = prefixes or [None]
+    finished = threading.Event()
+    failures = []
+
+    def report(job):
+        where = job.prefix or "default prefix"
+        if job.state == DONE:
+            print(f"{where}: {describe(job.result)} (waited {job.wait_ms:.0f} ms)")
+            return
+        failures.append(job)
+        if isinstance(job.error, FileNotFoundError):
+            print(f"{where}: 'wine' command not found", file=sys.stderr)
+        elif job.error is not None:
+            print(f"{where}: {job.error}", file=sys.stderr)
+        else:
+            print(f"{where}: {job.state}", file=sys.stderr)
+
+    def complete(total):
+        if len(prefixes) > 1:
+            print(f"{label}: {len(prefixes) - len(failures)} of {len(prefixes)} prefixes in {total:.0f} ms")
+        finished.set()
+
+    get_queue().submit_all(prefixes, label, run, report, complete)
+    try:
+        finished.wait()
+    except KeyboardInterrupt:
+        get_queue().cancel()
+        finished.wait()
+        return 130
+    finally:
+        from components.wine_session import shutdown_all
+        shutdown_all()
+    return 1 if failures else 0
+
+
+def cmd_apply(args):
+    from components.apply_backend import apply_colors, full_import_warning
+    from components.undo_stack import get_undo_stack
+
+    index = open_index(args)
+    name = resolve_theme(index, args.theme)
+    if name is None:
+        print(f"Theme not found: {args.theme}", file=sys.stderr)
+        return 2
+
+    entry = index.entries[name]
+    if entry['unknown_keys']:
+        print(f"Theme {args.theme} contains unknown key '{entry['unknown_keys'][0]}'. Aborting.", file=sys.stderr)
+        return 1
+
+    label = os.path.splitext(name)[0]
+    colors = dict(entry['colors'])
+    warning = full_import_warning(label, colors, entry['extra'], args.backend)
+    source = os.path.join(args.themes, name) if warning else None
+    if warning:
+        print(warning, file=sys.stderr)
+
+    def describe(result):
+        changed, elapsed = result
+        if source is not None:
+            return f"imported the whole theme file ({elapsed:.0f} ms)"
+        if not changed:
+            return f"already applied, skipped Wine ({elapsed:.0f} ms)"
+        return f"applied {len(changed)} of {len(colors)} colors ({elapsed:.0f} ms)"
+
+    return run_jobs(
+        args.prefix,
+        label,
+        lambda prefix, cancel: apply_colors(colors, args.backend, prefix, cancel, get_undo_stack(), label, source),
+        describe,
+    )
+
+
+def cmd_revert(args):
+    from components.apply_backend import revert_colors
+    from components.undo_stack import get_undo_stack
+
+    undo_stack = get_undo_stack()
+
+    def describe(result):
+        changed, elapsed = result
+        if not changed:
+            return f"already using the default theme, skipped Wine ({elapsed:.0f} ms)"
+        return f"reverted {len(changed)} colors to the defaults ({elapsed:.0f} ms)"
+
+    return run_jobs(
+        args.prefix,
+        "revert",
+        lambda prefix, cancel: revert_colors(args.backend, prefix, cancel, undo_stack, args.keys),
+        describe,
+    )
+
+
+def cmd_undo(args):
+    from components.apply_backend import undo_last_apply
+    from components.undo_stack import get_undo_stack
+
+    undo_stack = get_undo_stack()
+
+    def describe(result):
+        if result is None:
+            return "nothing to undo"
+        label, changed, elapsed = result
+        return f"undid {label}, restored {len(changed)} colors ({elapsed:.0f} ms)"
+
+    return run_jobs(
+        args.prefix,
+        "undo",
+        lambda prefix, cancel: undo_last_apply(undo_stack, args.backend, prefix, cancel, args.keys),
+        describe,
+    )
+
+
+def cmd_bench(args):
+    import subprocess
+    import tempfile
+    from components.reg_lexer import lex_line
+    from components.key_schema import get_schema
+    from components.theme_validator import check_theme
+
+    def timed(label, func, repeat=args.repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        print(f"{label:<28} median {samples[len(samples) // 2]:8.2f} ms   min {samples[0]:8.2f} ms")
+
+    names = list_theme_files(args.themes)
+    print(f"{len(names)} themes in {args.themes}")
+
+    script = os.path.abspath(__file__)
+    timed("cli startup (list)", lambda: subprocess.run(
+        [sys.executable, script, '--themes', args.themes, '--keys', args.keys, 'list'],
+        stdout=subprocess.DEVNULL, check=True,
+    ))
+
+    with tempfile.TemporaryDirectory() as scratch:
+        def cold_index():
+            index = ThemeIndex(args.themes, args.keys)
+            index.index_path = os.path.join(scratch, 'index.json')
+            index.entries = {}
+            index.refresh()
+
+        timed("index build (cold)", cold_index)
+
+    index = open_index(args)
+    timed("index refresh (warm)", index.refresh)
+
+    def lookup_all():
+        for name in names:
+            index.get(name)
+
+    timed("index lookup (cached)", lookup_all)
+
+    allowed = get_schema(args.keys).normalized
+
+    def lex_all():
+        lex_line.cache_clear()
+        for name in names:
+            check_theme(os.path.join(args.themes, name), allowed)
+
+    timed("validate all (uncached)", lex_all)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='vineyard', description="Manage Wine color themes without the GUI.")
+    parser.add_argument('--themes', default=THEMES_PATH, help="themes directory (default: ./themes)")
+    parser.add_argument('--keys', default=KEYS_PATH, help="allowed keys file (default: ./keys.json)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help="list available themes")
+    list_parser.add_argument('--json', action='store_true', help="print machine-readable output")
+    list_parser.set_defaults(func=cmd_list)
+
+    validate_parser = commands.add_parser('validate', help="check themes for syntax errors, unknown keys and bad colors")
+    validate_parser.add_argument('themes_to_check', nargs='*', metavar='THEME')
+    validate_parser.add_argument('--jobs', type=int, default=None, help="worker processes (default: one per core)")
+    validate_parser.add_argument('--no-cache', action='store_true', help="re-check files that have not changed")
+    validate_parser.add_argument('--jsonl', action='store_true', help="stream one JSON object per theme")
+    validate_parser.add_argument('--no-save', action='store_true', help="do not write results to the theme index")
+    validate_parser.set_defaults(func=cmd_validate)
+
+    for name, func, help_text in (
+        ('apply', cmd_apply, "apply a theme to one or more Wine prefixes"),
+        ('revert', cmd_revert, "restore the default Wine colors"),
+        ('undo', cmd_undo, "restore the colors from before the last apply or revert"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        if name == 'apply':
+            command.add_argument('theme', metavar='THEME')
+        command.add_argument('--prefix', action='append', help="target WINEPREFIX (repeatable, default: $WINEPREFIX or ~/.wine)")
+        command.add_argument('--backend', choices=('regedit', 'user.reg'), default=None,
+                             help="apply backend (default: $VINEYARD_BACKEND or regedit)")
+        command.set_defaults(func=func)
+
+    bench_parser = commands.add_parser('bench', help="time startup, indexing and validation")
+    bench_parser.add_argument('--repeat', type=int, default=5)
+    bench_parser.set_defaults(func=cmd_bench)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())